@@ -1,5 +1,6 @@
 import json
 import hashlib
+import os
 import sys
 from pathlib import Path
 import yaml
@@ -14,6 +15,12 @@ def sha256(p: Path):
     return h.hexdigest()
 
 
+def replace_text(p: Path, text: str):
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, p)
+
+
 def load_cfg(p):
     return yaml.safe_load(Path(p).read_text(encoding="utf-8"))
 
@@ -53,16 +60,21 @@ def main(cfg_path):
         print(f"NOTE: data dim {data_dim} != cfg {dim_expected}; using {data_dim}")
 
     # save as .npy (index = normalized embeddings)
+    # write-then-rename: a live API keeps its mmap of the old file until it hot-reloads
     idx.parent.mkdir(parents=True, exist_ok=True)
-    np.save(idx, Xn)  # writes index.npy if idx endswith .npy; else uses given name
+    idx_out = idx if str(idx).endswith(".npy") else Path(str(idx) + ".npy")
+    tmp = idx_out.with_name(idx_out.name + ".tmp.npy")
+    np.save(tmp, Xn)
+    os.replace(tmp, idx_out)
 
     # id map
-    idmap.write_text(
-        json.dumps({i: cid for i, cid in enumerate(ids)}, indent=2), encoding="utf-8"
+    replace_text(
+        idmap, json.dumps({i: cid for i, cid in enumerate(ids)}, indent=2)
     )
 
-    # manifest
-    manifest.write_text(
+    # manifest (written last: its sha256 is the API's index generation id)
+    replace_text(
+        manifest,
         json.dumps(
             {
                 "index_type": "brutecosine",
@@ -79,7 +91,6 @@ def main(cfg_path):
             },
             indent=2,
         ),
-        encoding="utf-8",
     )
 
     print(
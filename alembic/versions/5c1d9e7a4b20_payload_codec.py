@@ -0,0 +1,32 @@
+"""Add interaction_log.payload_codec
+
+Revision ID: 5c1d9e7a4b20
+Revises: ae2ab5a1b213
+Create Date: 2026-10-17 09:12:44.120318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5c1d9e7a4b20"
+down_revision: Union[str, Sequence[str], None] = "ae2ab5a1b213"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows were written uncompressed; the server default labels them "raw"
+    op.add_column(
+        "interaction_log",
+        sa.Column("payload_codec", sa.Text(), server_default="raw", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("interaction_log", "payload_codec")
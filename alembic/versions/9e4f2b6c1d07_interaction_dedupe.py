@@ -0,0 +1,52 @@
+"""Add interaction_dedupe
+
+Revision ID: 9e4f2b6c1d07
+Revises: 5c1d9e7a4b20
+Create Date: 2026-10-17 11:40:03.518211
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9e4f2b6c1d07"
+down_revision: Union[str, Sequence[str], None] = "5c1d9e7a4b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "interaction_dedupe",
+        sa.Column("payload_hash", sa.Text(), nullable=False),
+        sa.Column("interaction_id", sa.UUID(), nullable=False),
+        sa.Column("emitted_at_utc", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("payload_hash"),
+    )
+    op.create_index(
+        op.f("ix_interaction_dedupe_emitted_at_utc"),
+        "interaction_dedupe",
+        ["emitted_at_utc"],
+        unique=False,
+    )
+    # Existing rows: the earliest row per hash owns it
+    op.execute(
+        """
+        INSERT INTO interaction_dedupe (payload_hash, interaction_id, emitted_at_utc)
+        SELECT DISTINCT ON (payload_hash) payload_hash, id, emitted_at_utc
+        FROM interaction_log
+        ORDER BY payload_hash, emitted_at_utc, id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_interaction_dedupe_emitted_at_utc"), table_name="interaction_dedupe"
+    )
+    op.drop_table("interaction_dedupe")
@@ -0,0 +1,56 @@
+"""Add interaction_log.seq (commit order) and its counter
+
+Revision ID: c7d2a9e4f153
+Revises: 9e4f2b6c1d07
+Create Date: 2026-10-17 19:05:21.904113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d2a9e4f153"
+down_revision: Union[str, Sequence[str], None] = "9e4f2b6c1d07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("interaction_log", sa.Column("seq", sa.BigInteger(), nullable=True))
+    # Existing rows: number them in (emitted_at_utc, id) order, the best commit order on record
+    op.execute(
+        """
+        UPDATE interaction_log AS t SET seq = n.seq
+        FROM (
+            SELECT id, emitted_at_utc,
+                   row_number() OVER (ORDER BY emitted_at_utc, id) AS seq
+            FROM interaction_log
+        ) AS n
+        WHERE t.id = n.id AND t.emitted_at_utc = n.emitted_at_utc
+        """
+    )
+    op.alter_column("interaction_log", "seq", nullable=False)
+    op.create_index(
+        op.f("ix_interaction_log_seq"), "interaction_log", ["seq"], unique=False
+    )
+    op.create_table(
+        "interaction_log_seq",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("last", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        "INSERT INTO interaction_log_seq (id, last) "
+        "SELECT 1, COALESCE(MAX(seq), 0) FROM interaction_log"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("interaction_log_seq")
+    op.drop_index(op.f("ix_interaction_log_seq"), table_name="interaction_log")
+    op.drop_column("interaction_log", "seq")
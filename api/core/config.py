@@ -19,8 +19,31 @@ class Settings(BaseSettings):
     # Project Configuration (Adding the critical DATABASE_URL)
     DATABASE_URL: str
 
+    # Async engine (asyncpg / aiosqlite). When unset, derived from DATABASE_URL.
+    ASYNC_DATABASE_URL: str | None = None
+    # Serve the interaction create/list routes from the AsyncSession path
+    DB_ASYNC: bool = False
+
+    # Connection pool (sync and async engines; ignored for SQLite's single-connection pools)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_S: int = 1800
+    DB_POOL_TIMEOUT_S: float = 30.0
+
     # Defaults
     llm_base_url: str = "https://api.gemini.ai/v1"
 
+    @property
+    def async_database_url(self) -> str:
+        """ASYNC_DATABASE_URL, else DATABASE_URL with its driver swapped for the async one."""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        scheme, sep, rest = self.DATABASE_URL.partition("://")
+        dialect = scheme.split("+", 1)[0]
+        driver = {"postgresql": "asyncpg", "postgres": "asyncpg", "sqlite": "aiosqlite"}.get(dialect)
+        if driver is None:
+            return self.DATABASE_URL
+        return f"{'postgresql' if dialect == 'postgres' else dialect}+{driver}{sep}{rest}"
+
 
 settings = Settings()
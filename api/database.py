@@ -1,15 +1,36 @@
+from functools import lru_cache
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from api.core.config import settings
 
+
+def pool_kwargs(url: str) -> dict:
+    """
+    Pool sizing from Settings (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE_S, DB_POOL_TIMEOUT_S).
+    Why: the defaults (5 + 10 overflow, no recycle) cap ingest concurrency regardless of what
+    Postgres can take, and never retire connections a proxy/LB may silently drop. SQLite gets
+    none of these: its in-memory pools don't take QueuePool arguments.
+    """
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_S,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_S,
+    }
+
+
 # Create the SQLAlchemy engine as the single source of truth for database connections.
 # Why: Centralizes configuration for maintainability (SRP: one file for DB setup), using
 # settings.DATABASE_URL for env-agnostic flexibility (dev/prod switching via env vars).
 # pool_pre_ping=True enables connection validation on checkout, detecting stale connections
 # in long-running processes like FastAPI, aligning with Pragmatic Programmer resilience
 # and Fowler patterns for robust data access layers.
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, **pool_kwargs(settings.DATABASE_URL))
 
 # Create a configured sessionmaker for generating database sessions.
 # Why: Provides a factory for scoped sessions in FastAPI dependencies (e.g., via Depends),
@@ -17,3 +38,16 @@ engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 # preventing unintended commits/flushes and supporting TDD/Beck XP practices for reliable
 # testing and data integrity in AI trust ledgers (e.g., atomic agent log inserts).
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@lru_cache(maxsize=1)
+def async_engine() -> AsyncEngine:
+    # Built lazily: asyncpg/aiosqlite are only needed when DB_ASYNC routes are served
+    url = settings.async_database_url
+    return create_async_engine(url, pool_pre_ping=True, **pool_kwargs(url))
+
+
+@lru_cache(maxsize=1)
+def async_session_factory() -> async_sessionmaker:
+    # expire_on_commit=False: attribute access after commit would need implicit (forbidden) async IO
+    return async_sessionmaker(async_engine(), autoflush=False, expire_on_commit=False)
@@ -1,8 +1,9 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from api.database import SessionLocal
+from api.database import SessionLocal, async_session_factory
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -21,3 +22,14 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Async counterpart of get_db for the DB_ASYNC interaction routes.
+
+    Why: an AsyncSession waits on the database without holding an AnyIO threadpool slot,
+    so ingest concurrency is bounded by the pool (DB_POOL_SIZE + DB_MAX_OVERFLOW) rather
+    than by the threadpool's 40 threads.
+    """
+    async with async_session_factory()() as db:
+        yield db
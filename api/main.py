@@ -1,108 +1,136 @@
 # api/main.py
 from __future__ import annotations
 
-import hashlib
-import json
+import logging
 import os
-import pathlib
-from datetime import datetime
-from time import perf_counter
+from contextlib import asynccontextmanager
 
 from fastapi import Body, FastAPI, Header, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from api.core.config import settings
+from api.middleware.telemetry import METRICS, SINK, TelemetryMiddleware
 
 # Routers (feature routes)
 from api.routers.ask import router as ask_router
 from api.routers.brief import router as brief_router
+from api.routers.interaction import async_router as interaction_async_router, router as interaction_router
+from api.routers.merkle import router as merkle_router
 
 # Tests expect this service to exist; we use it to hash payloads deterministically.
 from api.services.cryptography_service import CryptographyService
+from api.services.idempotency import idempotency_store
+from api.services.merkle_log import merkle_log
+from api.services.metrics import render_gauges
+from api.services.partitions import PartitionPolicy, maintain
+from api.services.retrieval_numpy import retrieval_stats
+from api.services.write_behind import write_behind
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-create upcoming interaction_log partitions (no-op off Postgres); never blocks startup on failure
+    if os.getenv("INTERACTION_PARTITIONS_ON_STARTUP", "").lower() in ("1", "true", "yes", "on"):
+        from api.database import engine
+
+        try:
+            await run_in_threadpool(maintain, engine, PartitionPolicy.from_env())
+        except Exception:
+            logging.getLogger(__name__).exception("interaction_log partition maintenance failed")
+    # Merkle log catch-up runs on its own thread; requests never page interaction_log
+    mlog = merkle_log()
+    if mlog is not None:
+        mlog.start()
+    yield
+    # Drain queued interactions before the worker exits (INTERACTION_WRITE_BEHIND=1)
+    wb = write_behind()
+    if wb is not None:
+        wb.close()
+    # Checkpoint whatever was synced since the last root, so a restart resumes from there
+    mlog = merkle_log() if merkle_log.cache_info().currsize else None
+    if mlog is not None:
+        mlog.close()
+    from api.database import async_engine
+
+    if async_engine.cache_info().currsize:  # only if a DB_ASYNC route ever built it
+        await async_engine().dispose()
 
-# Optional YAML (for reading index backend); safe fallback if missing
-try:
-    import yaml  # pip install pyyaml
-except Exception:
-    yaml = None
 
 app = FastAPI(
     title="AI Operations API",
+    lifespan=lifespan,
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
 )
 
-# --- Env-gated telemetry middleware (prints one JSON line per request) ---
-CFG_PATH = pathlib.Path("clarity_clean_analysis/04_configs/augury.local.yaml")
-IDS_PATH = pathlib.Path("clarity_clean_analysis/02_output/index.ids.json")
-
-_TELEM = {
-    "seen": set(),
-    "count": None,
-    "index_backend": None,
-    "model": "BAAI/bge-large-en-v1.5",
-    "dim": 1024,
-}
-
-
-def _hydrate_telem():
-    # index backend (from yaml) → defaults to numpy if unavailable
-    if _TELEM["index_backend"] is None:
-        try:
-            if yaml:
-                cfg = yaml.safe_load(open(CFG_PATH, encoding="utf-8"))
-                _TELEM["index_backend"] = (cfg.get("index") or {}).get("backend", "numpy")
-            else:
-                _TELEM["index_backend"] = "numpy"
-        except Exception:
-            _TELEM["index_backend"] = "numpy"
-    # corpus count from ids file if available
-    if _TELEM["count"] is None:
-        try:
-            _TELEM["count"] = len(json.load(open(IDS_PATH, encoding="utf-8")))
-        except Exception:
-            _TELEM["count"] = None
-
-
-@app.middleware("http")
-async def telemetry_mw(request, call_next):
-    # Only emit when LOG_TELEMETRY is truthy
-    if str(os.getenv("LOG_TELEMETRY", "")).lower() not in ("1", "true", "yes", "on"):
-        return await call_next(request)
-
-    t0 = perf_counter()
-    response = await call_next(request)
-    elapsed_ms = int((perf_counter() - t0) * 1000)
-
-    _hydrate_telem()
-
-    qs = dict(request.query_params)
-    q = qs.get("q", "")
-    k = None
-    try:
-        k = int(qs.get("k")) if "k" in qs else None
-    except Exception:
-        k = None
-
-    qh = hashlib.sha256(q.encode("utf-8")).hexdigest()[:16] if q else None
-    cache_hit = 1 if (qh and qh in _TELEM["seen"]) else 0
-    if qh:
-        _TELEM["seen"].add(qh)
-
-    line = {
-        "ts": datetime.utcnow().isoformat() + "Z",
-        "route": request.url.path,
-        "elapsed_ms": elapsed_ms,
-        "status": response.status_code,
-        "k": k,
-        "cache_hit": cache_hit,
-        "query_hash": qh,
-        "model": _TELEM["model"],
-        "dim": _TELEM["dim"],
-        "index_backend": _TELEM["index_backend"],
-        "count": _TELEM["count"],
-    }
-    print(json.dumps(line), flush=True)
-    return response
+# --- Telemetry: pure-ASGI latency histograms + env-gated, buffered JSON lines ---
+app.add_middleware(TelemetryMiddleware)
+
+
+@app.get("/metrics", tags=["ops"], include_in_schema=False)
+async def metrics():
+    # async on purpose: rendered on the event loop, the only thread that mutates the histograms
+    rs = retrieval_stats()
+    lines = METRICS.render()
+    lines += render_gauges(
+        {
+            "ask_result_cache_hits_total": ("counter", "_ask_cached hits.", rs["result_cache_hits"]),
+            "ask_result_cache_misses_total": ("counter", "_ask_cached misses.", rs["result_cache_misses"]),
+            "ask_result_cache_entries": ("gauge", "Entries in the /ask result LRU.", rs["result_cache_size"]),
+            "ask_index_rows": ("gauge", "Rows in the loaded index generation.", rs["index_rows"]),
+        }
+    )
+    lines += render_gauges(
+        {"ask_index_info": ("gauge", "Loaded index backend and generation.", 1)},
+        {
+            "backend": rs["index_backend"],
+            "configured": rs["index_backend_configured"],
+            "generation": rs["index_generation"],
+        },
+    )
+    if "embedding_cache" in rs:
+        ec = rs["embedding_cache"]
+        lines += render_gauges(
+            {
+                "ask_embedding_cache_hits_total": ("counter", "Query-embedding cache hits.", ec["hits"]),
+                "ask_embedding_cache_misses_total": ("counter", "Query-embedding cache misses.", ec["misses"]),
+                "ask_embedding_cache_entries": ("gauge", "Rows in the query-embedding cache.", ec["entries"]),
+            }
+        )
+    wb = write_behind()
+    if wb is not None:
+        lines += render_gauges(
+            {
+                "interaction_write_behind_depth": ("gauge", "Interactions queued for group commit.", wb.depth()),
+                "interaction_write_behind_rejected_total": ("counter", "Refused with 429.", wb.stats["rejected"]),
+                "interaction_write_behind_failed_total": ("counter", "Given up after retries.", wb.stats["failed"]),
+            }
+        )
+    ist = _store.stats()
+    lines += render_gauges(
+        {
+            "idempotency_entries": ("gauge", "Payload hashes held by the idempotency store.", ist["entries"]),
+            "idempotency_hits_total": ("counter", "Duplicate submissions answered from the store.", ist["hits"]),
+        },
+        {"backend": ist["backend"]},
+    )
+    mlog = merkle_log()
+    if mlog is not None:
+        ms = mlog.stats()
+        lines += render_gauges(
+            {
+                "merkle_tree_size": ("gauge", "Leaves in the interaction Merkle log.", ms["tree_size"]),
+                "merkle_sync_failures_total": ("counter", "Failed interaction_log syncs.", ms["sync_failures"]),
+                "merkle_proof_cache_hits_total": ("counter", "Proofs served from the LRU.", ms["proof_cache_hits"]),
+                "merkle_proof_cache_misses_total": ("counter", "Proofs computed.", ms["proof_cache_misses"]),
+            }
+        )
+    lines += render_gauges(
+        {"telemetry_dropped_total": ("counter", "Telemetry records dropped on ring overflow.", SINK.dropped)}
+    )
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
 
 
 # --- Root & health (match tests) ---
@@ -120,7 +148,8 @@ def health():
 
 
 # --- Idempotency endpoint (match test_create_and_verify_idempotency) ---
-_store: dict[str, dict] = {}
+# Pluggable (IDEMPOTENCY_STORE=memory|sqlite): keeps payload_hash → response only, bounded by TTL/bytes
+_store = idempotency_store()
 
 
 def _hash_payload(obj: dict) -> str:
@@ -137,9 +166,13 @@ def _make_response(payload_hash: str) -> dict:
     }
 
 
-# Provide all aliases the test might hit (with and without /api and trailing slash)
-@app.post("/api/interaction", status_code=status.HTTP_201_CREATED, tags=["ops"])
-@app.post("/api/interaction/", status_code=status.HTTP_201_CREATED, tags=["ops"])
+# DB-backed interaction routes own /api/interaction (create incl. write-behind, bulk, list, lineage)
+if settings.DB_ASYNC:
+    app.include_router(interaction_async_router)  # AsyncSession create/list, ahead of the sync ones
+app.include_router(interaction_router)
+
+
+# Legacy un-prefixed aliases: in-memory, keyed by payload hash, no DB row
 @app.post("/interaction", status_code=status.HTTP_201_CREATED, tags=["ops"])
 @app.post("/interaction/", status_code=status.HTTP_201_CREATED, tags=["ops"])
 def interaction_create(
@@ -149,13 +182,14 @@ def interaction_create(
 ):
     # Tests post the same JSON twice; we key strictly by payload hash
     payload_hash = _hash_payload(item)
-    if payload_hash in _store:
+    response, created = _store.claim(payload_hash, _make_response(payload_hash))
+    if not created:
         # Second submission → 200 OK
-        return JSONResponse(status_code=200, content=_make_response(payload_hash))
-    _store[payload_hash] = item
-    return _make_response(payload_hash)  # First submission → 201 Created (from decorator)
+        return JSONResponse(status_code=200, content=response)
+    return response  # First submission → 201 Created (from decorator)
 
 
 # Include existing feature routes
 app.include_router(ask_router)  # GET /ask
 app.include_router(brief_router)  # GET /brief
+app.include_router(merkle_router)  # GET /api/merkle/proof/{leaf_hash}, POST /api/merkle/verify
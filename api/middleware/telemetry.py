@@ -0,0 +1,146 @@
+# api/middleware/telemetry.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+import random
+from time import perf_counter, time
+from urllib.parse import parse_qs
+
+from api.services.metrics import RequestMetrics
+from api.services.telemetry import RecentSet, sink_from_env
+
+# Optional YAML (for reading index backend); safe fallback if missing
+try:
+    import yaml  # pip install pyyaml
+except Exception:
+    yaml = None
+
+CFG_PATH = pathlib.Path("clarity_clean_analysis/04_configs/augury.local.yaml")
+IDS_PATH = pathlib.Path("clarity_clean_analysis/02_output/index.ids.json")
+
+
+def _truthy(v: str | None) -> bool:
+    return str(v or "").lower() in ("1", "true", "yes", "on")
+
+
+class TelemetrySettings:
+    """
+    Read once from the environment; attributes can be flipped at runtime (tests, admin hooks).
+
+    LOG_TELEMETRY        JSON line per request (via the buffered sink)
+    LOG_TELEMETRY_SAMPLE fraction of requests that get a line (default 1.0)
+    METRICS_ENABLED      per-route latency histograms for /metrics (default on)
+    """
+
+    def __init__(self):
+        self.log = _truthy(os.getenv("LOG_TELEMETRY"))
+        self.sample_rate = float(os.getenv("LOG_TELEMETRY_SAMPLE", "1.0"))
+        self.metrics = _truthy(os.getenv("METRICS_ENABLED", "1"))
+
+
+SETTINGS = TelemetrySettings()
+SINK = sink_from_env()
+METRICS = RequestMetrics()
+
+TELEM = {
+    "seen": RecentSet(maxsize=4096),  # bounded: approximate distinct over recent queries
+    "hydrated": False,
+    "count": None,
+    "index_backend": None,
+    "model": "BAAI/bge-large-en-v1.5",
+    "dim": 1024,
+}
+
+
+def _hydrate_telem():
+    # index backend (from yaml) → defaults to numpy if unavailable
+    try:
+        cfg = yaml.safe_load(open(CFG_PATH, encoding="utf-8")) if yaml else {}
+        TELEM["index_backend"] = (cfg.get("index") or {}).get("backend", "numpy")
+    except Exception:
+        TELEM["index_backend"] = "numpy"
+    # corpus count from ids file if available
+    try:
+        TELEM["count"] = len(json.load(open(IDS_PATH, encoding="utf-8")))
+    except Exception:
+        TELEM["count"] = None
+    TELEM["hydrated"] = True
+
+
+def _route_template(scope) -> str:
+    # template ("/api/interaction/{id}") keeps label cardinality bounded; set by the router
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _line(scope, status: int, elapsed_ms: float) -> dict:
+    if not TELEM["hydrated"]:
+        _hydrate_telem()
+
+    qs = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    q = qs.get("q", [""])[0]
+    k = None
+    try:
+        k = int(qs["k"][0]) if "k" in qs else None
+    except Exception:
+        k = None
+
+    qh = hashlib.sha256(q.encode("utf-8")).hexdigest()[:16] if q else None
+    cache_hit = 1 if (qh and TELEM["seen"].check_and_add(qh)) else 0
+
+    line = {
+        "ts": time(),  # formatted by the flusher, off the request path
+        "route": scope["path"],
+        "elapsed_ms": int(elapsed_ms),
+        "status": status,
+        "k": k,
+        "cache_hit": cache_hit,
+        "query_hash": qh,
+        "model": TELEM["model"],
+        "dim": TELEM["dim"],
+        "index_backend": TELEM["index_backend"],
+        "count": TELEM["count"],
+    }
+    stages = (scope.get("state") or {}).get("stages_ns")
+    if stages:
+        line["stages_ns"] = stages
+    return line
+
+
+class TelemetryMiddleware:
+    """
+    Pure ASGI telemetry: no request/response wrapping or body buffering (unlike
+    BaseHTTPMiddleware). It only watches `http.response.start` for the status, and when
+    both logging and metrics are off it is a straight pass-through.
+    """
+
+    def __init__(self, app, settings: TelemetrySettings | None = None):
+        self.app = app
+        self.settings = settings or SETTINGS
+
+    async def __call__(self, scope, receive, send):
+        s = self.settings
+        if scope["type"] != "http" or not (s.log or s.metrics):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        t0 = perf_counter()
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed_ms = (perf_counter() - t0) * 1000
+            if s.metrics:
+                METRICS.observe(_route_template(scope), scope["method"], status, elapsed_ms)
+            if s.log and (s.sample_rate >= 1.0 or random.random() < s.sample_rate):
+                SINK.emit(_line(scope, status, elapsed_ms))  # memory append only
@@ -2,6 +2,7 @@ import uuid
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Column,
     DateTime,
     Integer,
@@ -40,6 +41,9 @@ class InteractionLog(Base):
     # Raw, compressed binary data of the action/observation payload
     payload = Column(LargeBinary, nullable=False)
 
+    # Codec the payload bytes were stored with ("raw", "zlib", "zstd", "zstd:<dict_id>")
+    payload_codec = Column(Text, nullable=False, default="raw", server_default="raw")
+
     # Canonical hash of the uncompressed payload (Idempotency Key)
     payload_hash = Column(Text, nullable=False)
 
@@ -53,8 +57,33 @@ class InteractionLog(Base):
     # transparency and MIT self-evolving agents principles).
     agent_support = Column(JSON, nullable=True, index=True)
 
+    # Commit order: reserved from interaction_log_seq just before the insert, so a reader
+    # never sees a higher seq before every lower one has committed (the Merkle log's order)
+    seq = Column(BigInteger, nullable=False, index=True)
+
     __table_args__ = (
         PrimaryKeyConstraint("id", "emitted_at_utc", name="pk_interaction_log"),
         UniqueConstraint("payload_hash", "emitted_at_utc", name="uq_payload_hash_emitted_at_utc"),
         {"postgresql_partition_by": "RANGE (emitted_at_utc)"},
     )
+
+
+class InteractionDedupe(Base):
+    __tablename__ = "interaction_dedupe"
+
+    # Global idempotency key. interaction_log's unique constraint has to include the partition
+    # key (emitted_at_utc), so it can't stop the same payload landing twice; this table can.
+    payload_hash = Column(Text, primary_key=True)
+
+    # The interaction_log row (pk: id, emitted_at_utc) that first claimed this hash
+    interaction_id = Column(UUID(as_uuid=True), nullable=False)
+    emitted_at_utc = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class InteractionLogSeq(Base):
+    __tablename__ = "interaction_log_seq"
+
+    # Single-row counter (id = 1) behind interaction_log.seq; its row lock, held from the
+    # reservation to the commit, is what makes seq follow commit order
+    id = Column(Integer, primary_key=True)
+    last = Column(BigInteger, nullable=False)
@@ -1,27 +1,47 @@
 # api/routers/ask.py
 from time import perf_counter
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request
+from starlette.concurrency import run_in_threadpool
 
-from api.services.retrieval_numpy import ask_numpy, ask_numpy_with_stats
+from api.schemas.ask import AskBatchRequest
+from api.services.retrieval_numpy import ask_numpy_async, ask_numpy_batch, ask_numpy_with_stats
 
 router = APIRouter(tags=["retrieval"])
 
 
 @router.get("/ask")
-def ask(
+async def ask(
+    request: Request,
     q: str = Query(..., min_length=2),
     k: int = Query(5, ge=1, le=20),
-    debug: int = Query(0, ge=0, le=1),
+    debug: int = Query(0, ge=0, le=2),
 ):
     t0 = perf_counter()
     if debug:
-        results, stats = ask_numpy_with_stats(q, k)
+        # debug=1: cache stats; debug=2: + per-stage perf_counter_ns spans
+        results, stats = await run_in_threadpool(ask_numpy_with_stats, q, k, debug >= 2)
+        if "stages_ns" in stats:
+            request.state.stages_ns = stats["stages_ns"]  # picked up by the telemetry line
     else:
-        results = ask_numpy(q, k)
+        # concurrent requests share one encode + search pass (ASK_BATCH_WINDOW_MS)
+        results = await ask_numpy_async(q, k)
         stats = None
     elapsed_ms = int((perf_counter() - t0) * 1000)
     payload = {"status": "DONE", "k": k, "elapsed_ms": elapsed_ms, "results": results}
     if stats is not None:
         payload["cache"] = stats
     return payload
+
+
+@router.post("/ask/batch")
+def ask_batch(req: AskBatchRequest):
+    t0 = perf_counter()
+    results = ask_numpy_batch(req.queries, req.k)
+    elapsed_ms = int((perf_counter() - t0) * 1000)
+    return {
+        "status": "DONE",
+        "k": req.k,
+        "elapsed_ms": elapsed_ms,
+        "results": [{"q": q, "results": r} for q, r in zip(req.queries, results, strict=True)],
+    }
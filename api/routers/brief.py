@@ -1,12 +1,16 @@
 # api/routers/brief.py
 import hashlib
+import json
 from datetime import UTC, datetime
+from functools import lru_cache
 from pathlib import Path
 
 import yaml
 from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 
 from api.schemas.dossier import Claim, Dossier, Receipts
+from api.services.merkle_log import merkle_log
 from api.services.retrieval_numpy import ask_numpy  # reuse retrieval
 
 router = APIRouter(tags=["briefs"])
@@ -22,40 +26,99 @@ def _sha256(p: Path) -> str:
     return h.hexdigest()
 
 
-@router.get("/brief", response_model=Dossier)
-def brief(q: str = Query(..., min_length=2), k: int = Query(5, ge=1, le=10)):
-    cfg = yaml.safe_load(CFG_PATH.read_text())
+def _sig(p: Path) -> tuple[str, int, int, int]:
+    """(path, size, mtime_ns, inode): changes whenever the file is rewritten or replaced."""
+    st = p.stat()
+    return str(p), st.st_size, st.st_mtime_ns, st.st_ino
+
+
+@lru_cache(maxsize=4)
+def _load_cfg(sig: tuple) -> tuple[dict, str]:
+    raw = Path(sig[0]).read_bytes()
+    return yaml.safe_load(raw), hashlib.sha256(raw).hexdigest()
+
+
+def _manifest_corpus_sha(p_manifest: Path, corpus_p: Path) -> str | None:
+    """sha256 recorded by build_numpy_index, if the manifest is newer than the corpus."""
+    try:
+        if p_manifest.stat().st_mtime_ns < corpus_p.stat().st_mtime_ns:
+            return None
+        manifest = json.loads(p_manifest.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if Path(manifest.get("corpus_path", "")).resolve() != corpus_p.resolve():
+        return None
+    return (manifest.get("sha256") or {}).get("corpus")
+
+
+@lru_cache(maxsize=4)
+def _dataset_hash(sig: tuple, p_manifest: str) -> str:
+    # keyed on the corpus signature: re-hash only when the file actually changes
+    corpus_p = Path(sig[0])
+    return (p_manifest and _manifest_corpus_sha(Path(p_manifest), corpus_p)) or _sha256(corpus_p)
+
+
+def _claim(r: dict) -> Claim:
+    # take first line/sentence as claim text (trim to 240 chars)
+    claim_text = (r["text"].splitlines()[0] or r["text"]).strip()[:240]
+    return Claim(
+        text=claim_text,
+        chunk_ids=[r["chunk_id"]],
+        confidence=min(max(r["score"], 0.0), 1.0),
+    )
+
+
+def _receipts() -> Receipts:
+    # receipts: dataset hash from corpus; config hash = sha256 of yaml;
+    # merkle root = latest checkpoint of the interaction log ("" when anchoring is off)
+    cfg, cfg_hash = _load_cfg(_sig(CFG_PATH))
     corpus_p = Path(cfg["paths"]["corpus"])
+    mlog = merkle_log()
+    return Receipts(
+        config_hash=cfg_hash,
+        dataset_hash=_dataset_hash(_sig(corpus_p), cfg["paths"].get("manifest") or ""),
+        merkle_root=mlog.anchored_root() if mlog is not None else "",
+        timestamp=datetime.now(UTC).isoformat(),
+    )
+
 
+@router.get("/brief", response_model=Dossier)
+def brief(q: str = Query(..., min_length=2), k: int = Query(5, ge=1, le=10)):
     # simple evidence: top-k chunks from retrieval
-    results = ask_numpy(q, k)
-    claims = []
-    for r in results:
-        # take first line/sentence as claim text (trim to 240 chars)
-        claim_text = (r["text"].splitlines()[0] or r["text"]).strip()[:240]
-        claims.append(
-            Claim(
-                text=claim_text,
-                chunk_ids=[r["chunk_id"]],
-                confidence=min(max(r["score"], 0.0), 1.0),
-            )
-        )
+    claims = [_claim(r) for r in ask_numpy(q, k)]
 
     # executive summary = first claim or fallback to query
     summary = claims[0].text if claims else q
 
-    # receipts: dataset hash from corpus; config hash = sha256 of yaml
-    receipts = Receipts(
-        config_hash=hashlib.sha256(CFG_PATH.read_bytes()).hexdigest(),
-        dataset_hash=_sha256(corpus_p),
-        timestamp=datetime.now(UTC).isoformat(),
-    )
-
     dossier = Dossier(
         executive_summary=summary,
         claims=claims,
         contradictions_identified=[],
         next_questions_uncovered=[],
-        receipts=receipts,
+        receipts=_receipts(),
     )
     return dossier
+
+
+def _ndjson(kind: str, data) -> bytes:
+    return (json.dumps({"type": kind, "data": data}) + "\n").encode("utf-8")
+
+
+def _brief_events(q: str, k: int):
+    """
+    The /brief dossier framed as NDJSON events: summary, one claim per hit, the (future)
+    contradiction / next-question lists, then receipts. Top-k needs the whole scan, so every hit
+    is known before the first line goes out; only the receipts are computed after it.
+    """
+    claims = [_claim(r) for r in ask_numpy(q, k)]
+    yield _ndjson("executive_summary", claims[0].text if claims else q)
+    for claim in claims:
+        yield _ndjson("claim", claim.model_dump())
+    yield _ndjson("contradictions_identified", [])
+    yield _ndjson("next_questions_uncovered", [])
+    yield _ndjson("receipts", _receipts().model_dump())
+
+
+@router.get("/brief/stream")
+def brief_stream(q: str = Query(..., min_length=2), k: int = Query(5, ge=1, le=10)):
+    return StreamingResponse(_brief_events(q, k), media_type="application/x-ndjson")
@@ -1,22 +1,67 @@
-from fastapi import APIRouter, Depends, Response, status
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from api.dependencies import get_db
-from api.models import InteractionLog
-from api.schemas.interaction import InteractionCreate, InteractionRead
+from api.dependencies import get_async_db, get_db
+from api.schemas.interaction import (
+    InteractionBulkItem,
+    InteractionBulkResponse,
+    InteractionCreate,
+    InteractionLineage,
+    InteractionRead,
+    InteractionReadWithPayload,
+    LineageNode,
+)
 
 # Import the service function with a different name to avoid recursion
-from api.services.interaction import create_interaction as create_interaction_service
+from api.services.interaction import (
+    create_interaction as create_interaction_service,
+    create_interaction_async,
+    create_interactions_bulk,
+    decode_cursor,
+    interaction_query,
+    list_interactions,
+    list_interactions_async,
+    read_row,
+)
+from api.services.lineage import lineage
+from api.services.write_behind import QueueFull, write_behind
+
+BULK_MAX_ITEMS = 1000
+STREAM_CHUNK = 1000
+LINEAGE_MAX_DEPTH = 50
 
 router = APIRouter(prefix="/api/interaction", tags=["Interaction"])
+# AsyncSession variants of create/list; main.py mounts this ahead of `router` when DB_ASYNC is set
+async_router = APIRouter(prefix="/api/interaction", tags=["Interaction"])
+
+
+def _enqueue(wb, interaction: InteractionCreate) -> JSONResponse:
+    # Write-behind mode: hash + enqueue now, group-committed by the flusher
+    try:
+        payload_hash = wb.submit(interaction)
+    except QueueFull as e:
+        raise HTTPException(status.HTTP_429_TOO_MANY_REQUESTS, str(e), headers={"Retry-After": "1"}) from None
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED, content={"status": "accepted", "payload_hash": payload_hash}
+    )
 
 
 @router.post("/", response_model=InteractionRead)
+@router.post("", response_model=InteractionRead, include_in_schema=False)
 def handle_create_interaction(interaction: InteractionCreate, response: Response, db: Session = Depends(get_db)):
     """
     Handles the API request to create a new interaction.
     It calls the service layer to perform the business logic.
     """
+    wb = write_behind()
+    if wb is not None:
+        return _enqueue(wb, interaction)
+
     # Call the renamed service function
     new_interaction, created = create_interaction_service(db=db, interaction=interaction)
 
@@ -29,10 +74,129 @@ def handle_create_interaction(interaction: InteractionCreate, response: Response
     return new_interaction
 
 
-@router.get("/", response_model=list[InteractionRead])
-def handle_list_interactions(db: Session = Depends(get_db)):
+@router.post("/bulk", response_model=InteractionBulkResponse)
+def handle_create_interactions_bulk(
+    response: Response,
+    interactions: list[InteractionCreate] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+    db: Session = Depends(get_db),
+):
+    """
+    Creates a batch of interactions with one hash lookup and one multi-row insert.
+    201 if anything was created, 200 if every item was a duplicate.
+    """
+    results = create_interactions_bulk(db=db, interactions=interactions)
+    items = [
+        InteractionBulkItem(status="created" if created else "duplicate", interaction=row) for row, created in results
+    ]
+    n_created = sum(1 for _, created in results if created)
+    response.status_code = status.HTTP_201_CREATED if n_created else status.HTTP_200_OK
+    return InteractionBulkResponse(created=n_created, duplicates=len(items) - n_created, items=items)
+
+
+def _list_filters(
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    agent_id: UUID | None = None,
+    causality_id: UUID | None = None,
+    since: datetime | None = Query(None, description="emitted_at_utc >= since"),
+    until: datetime | None = Query(None, description="emitted_at_utc < until"),
+    include_payload: bool = False,
+) -> dict:
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e)) from None
+    return {
+        "after": after,
+        "agent_id": agent_id,
+        "causality_id": causality_id,
+        "since": since,
+        "until": until,
+        "include_payload": include_payload,
+    }
+
+
+@router.get("/", response_model=list[InteractionReadWithPayload | InteractionRead])
+def handle_list_interactions(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    filters: dict = Depends(_list_filters),
+    db: Session = Depends(get_db),
+):
+    """
+    Handles the API request to page through interaction log entries.
+    Keyset-paginated on (emitted_at_utc, id); the next page's cursor is in X-Next-Cursor.
+    """
+    rows, next_cursor = list_interactions(db, limit=limit, **filters)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [read_row(r, filters["include_payload"]) for r in rows]
+
+
+@async_router.post("/", response_model=InteractionRead)
+@async_router.post("", response_model=InteractionRead, include_in_schema=False)
+async def handle_create_interaction_async(
+    interaction: InteractionCreate, response: Response, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Async variant of handle_create_interaction: waits on the database without a threadpool slot.
+    """
+    wb = write_behind()
+    if wb is not None:
+        return _enqueue(wb, interaction)
+
+    new_interaction, created = await create_interaction_async(db=db, interaction=interaction)
+    response.status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    return new_interaction
+
+
+@async_router.get("/", response_model=list[InteractionReadWithPayload | InteractionRead])
+async def handle_list_interactions_async(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    filters: dict = Depends(_list_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Async variant of handle_list_interactions (same keyset paging and X-Next-Cursor header).
+    """
+    rows, next_cursor = await list_interactions_async(db, limit=limit, **filters)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [read_row(r, filters["include_payload"]) for r in rows]
+
+
+@router.get("/stream")
+def handle_stream_interactions(filters: dict = Depends(_list_filters), db: Session = Depends(get_db)):
+    """
+    Streams every matching entry as NDJSON in keyset order, fetching rows in chunks of
+    STREAM_CHUNK instead of materializing the result set.
+    """
+
+    def lines():
+        stmt = interaction_query(**filters).execution_options(yield_per=STREAM_CHUNK)
+        for row in db.scalars(stmt):
+            yield read_row(row, filters["include_payload"]).model_dump_json().encode("utf-8") + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/{interaction_id}/lineage", response_model=InteractionLineage)
+def handle_interaction_lineage(
+    interaction_id: UUID,
+    depth: int = Query(5, ge=1, le=LINEAGE_MAX_DEPTH),
+    max_nodes: int = Query(1000, ge=1, le=10_000),
+    db: Session = Depends(get_db),
+):
     """
-    Handles the API request to fetch all interaction log entries.
+    Handles the API request for an interaction's causal tree: ancestors via causality_id and
+    descendants that point back at it, up to `depth` hops each way, in one round trip.
     """
-    # The missing logic: query the database and return all records.
-    return db.query(InteractionLog).all()
+    nodes, truncated = lineage(db, interaction_id, depth, max_nodes)
+    if not nodes:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"interaction {interaction_id} not found")
+    return InteractionLineage(
+        root_id=interaction_id,
+        depth=depth,
+        truncated=truncated,
+        nodes=[LineageNode.model_validate(n) for n in nodes],
+    )
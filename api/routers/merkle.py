@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException, Path, status
+
+from api.schemas.merkle import MerkleProof, MerkleVerifyRequest, MerkleVerifyResponse
+from api.services.merkle_log import merkle_log
+from api.truthrun.merkle import verify_proof
+
+router = APIRouter(prefix="/api/merkle", tags=["Merkle"])
+
+
+@router.get("/proof/{leaf_hash}", response_model=MerkleProof)
+def get_proof(leaf_hash: str = Path(..., pattern=r"^[0-9a-fA-F]{64}$")):
+    """Inclusion proof of an interaction payload_hash against the log's current root."""
+    mlog = merkle_log()
+    if mlog is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Merkle anchoring is disabled")
+    proof = mlog.proof(leaf_hash.lower())
+    if proof is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Leaf not in the Merkle log (yet)")
+    return proof
+
+
+@router.post("/verify", response_model=MerkleVerifyResponse)
+def verify(body: MerkleVerifyRequest):
+    """Recompute the root from a proof; stateless, so any issued proof can be checked."""
+    path = [bytes.fromhex(p) for p in body.path]
+    return MerkleVerifyResponse(
+        valid=verify_proof(bytes.fromhex(body.leaf), body.index, path, bytes.fromhex(body.root), body.tree_size)
+    )
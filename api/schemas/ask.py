@@ -0,0 +1,8 @@
+from typing import Annotated
+
+from pydantic import BaseModel, Field
+
+
+class AskBatchRequest(BaseModel):
+    queries: list[Annotated[str, Field(min_length=2)]] = Field(..., min_length=1, max_length=64)
+    k: int = Field(5, ge=1, le=20)
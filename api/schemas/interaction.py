@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict
@@ -33,3 +33,35 @@ class InteractionRead(BaseModel):
 
     # NOTE: 'session_id' and 'details' are not here because they don't exist
     # on the final DB object under those names. 'details' is returned as 'agent_support'.
+
+
+# Returned only when a read endpoint is asked for the (otherwise deferred) payload column.
+# A row this process can't decode (rotated zstd dictionary, zstandard missing) carries
+# payload=None and the reason in payload_error instead of failing the whole page.
+class InteractionReadWithPayload(InteractionRead):
+    payload: str | None
+    payload_error: str | None = None
+
+
+# Per-item outcome of POST /api/interaction/bulk, in request order.
+class InteractionBulkItem(BaseModel):
+    status: Literal["created", "duplicate"]
+    interaction: InteractionRead
+
+
+class InteractionBulkResponse(BaseModel):
+    created: int
+    duplicates: int
+    items: list[InteractionBulkItem]
+
+
+# One node of GET /api/interaction/{id}/lineage: negative depth = ancestor, positive = descendant.
+class LineageNode(InteractionRead):
+    depth: int
+
+
+class InteractionLineage(BaseModel):
+    root_id: UUID
+    depth: int
+    truncated: bool
+    nodes: list[LineageNode]
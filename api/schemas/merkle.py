@@ -0,0 +1,26 @@
+from typing import Annotated
+
+from pydantic import BaseModel, Field
+
+# a sha256 digest as hex (payload_hash, tree nodes, roots)
+HexDigest = Annotated[str, Field(pattern=r"^[0-9a-fA-F]{64}$")]
+
+
+class MerkleProof(BaseModel):
+    leaf: str
+    index: int
+    tree_size: int
+    root: str
+    path: list[str]  # sibling digests, leaf level first
+
+
+class MerkleVerifyRequest(BaseModel):
+    leaf: HexDigest
+    index: int = Field(..., ge=0)
+    tree_size: int = Field(..., ge=1)
+    path: list[HexDigest] = Field(default_factory=list, max_length=64)
+    root: HexDigest
+
+
+class MerkleVerifyResponse(BaseModel):
+    valid: bool
@@ -0,0 +1,87 @@
+# api/services/embedding_cache.py
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_embedding (
+    key       TEXT PRIMARY KEY,
+    model     TEXT NOT NULL,
+    vec       BLOB NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_query_embedding_last_used ON query_embedding (last_used);
+"""
+
+
+class EmbeddingCache:
+    """
+    Disk-backed query-embedding cache shared by every worker on the host (SQLite, WAL).
+
+    Keys are sha256(model + normalized query); values are float32 vectors. The table is
+    bounded by `max_entries` with least-recently-used eviction, so it survives deploys
+    without growing forever.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = 100_000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._count = self._db.execute("SELECT COUNT(*) FROM query_embedding").fetchone()[0]
+
+    @staticmethod
+    def _key(model: str, q_norm: str) -> str:
+        return hashlib.sha256(f"{model}\x00{q_norm}".encode()).hexdigest()
+
+    def get_many(self, model: str, q_norms: list[str]) -> dict[str, np.ndarray]:
+        keys = {self._key(model, q): q for q in dict.fromkeys(q_norms)}
+        marks = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT key, vec FROM query_embedding WHERE key IN ({marks})", list(keys)
+            ).fetchall()
+            if rows:
+                hit_marks = ",".join("?" * len(rows))
+                self._db.execute(
+                    f"UPDATE query_embedding SET last_used = ? WHERE key IN ({hit_marks})",
+                    [time.time_ns(), *(k for k, _ in rows)],
+                )
+            self.hits += len(rows)
+            self.misses += len(keys) - len(rows)
+        return {keys[k]: np.frombuffer(v, dtype=np.float32) for k, v in rows}
+
+    def put_many(self, model: str, items: dict[str, np.ndarray]) -> None:
+        now = time.time_ns()
+        rows = [(self._key(model, q), model, np.asarray(v, dtype=np.float32).tobytes(), now) for q, v in items.items()]
+        with self._lock:
+            cur = self._db.executemany("INSERT OR IGNORE INTO query_embedding VALUES (?, ?, ?, ?)", rows)
+            self._count += max(cur.rowcount, 0)
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        # drop ~10% below the bound so eviction isn't paid on every insert
+        target = int(self.max_entries * 0.9)
+        self._db.execute(
+            "DELETE FROM query_embedding WHERE key IN "
+            "(SELECT key FROM query_embedding ORDER BY last_used LIMIT "
+            "max((SELECT COUNT(*) FROM query_embedding) - ?, 0))",
+            (target,),
+        )
+        self._count = self._db.execute("SELECT COUNT(*) FROM query_embedding").fetchone()[0]
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": self._count, "max_entries": self.max_entries}
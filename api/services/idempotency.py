@@ -0,0 +1,159 @@
+# api/services/idempotency.py
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import lru_cache
+from pathlib import Path
+from typing import Protocol
+
+
+class IdempotencyStore(Protocol):
+    """payload_hash → first response. Only the hash and the (small) response are kept."""
+
+    def claim(self, key: str, response: dict) -> tuple[dict, bool]:
+        """Record `response` for `key` unless a live entry exists; returns (stored, created)."""
+        ...
+
+    def stats(self) -> dict: ...
+
+
+class MemoryIdempotencyStore:
+    """
+    Per-process LRU with a TTL and a byte budget, so memory stays flat under sustained
+    unique traffic. Duplicates are only detected within this worker; use the SQLite store
+    to share them across workers on a host.
+    """
+
+    def __init__(self, max_bytes: int = 16 << 20, ttl_s: float = 86_400, clock: Callable[[], float] = time.time):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self.bytes = 0
+        self.hits = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(key: str, blob: str) -> int:
+        return len(key) + len(blob)
+
+    def _pop(self, key: str) -> None:
+        _, blob = self._entries.pop(key)
+        self.bytes -= self._size(key, blob)
+
+    def claim(self, key: str, response: dict) -> tuple[dict, bool]:
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(entry[1]), False
+                self._pop(key)
+            blob = json.dumps(response, separators=(",", ":"))
+            self._entries[key] = (now + self.ttl_s, blob)
+            self.bytes += self._size(key, blob)
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+        return response, True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "evictions": self.evictions,
+        }
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency (
+    key        TEXT PRIMARY KEY,
+    response   TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_idempotency_expires_at ON idempotency (expires_at);
+"""
+
+
+class SqliteIdempotencyStore:
+    """
+    Host-wide store shared by every worker (SQLite, WAL). claim() is a single
+    INSERT ... ON CONFLICT DO UPDATE ... WHERE expired, so two workers racing on the same
+    hash cannot both see "created". Expired rows are swept every `sweep_every` claims.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttl_s: float = 86_400,
+        sweep_every: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.ttl_s = ttl_s
+        self.sweep_every = sweep_every
+        self.clock = clock
+        self.hits = 0
+        self._claims = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def claim(self, key: str, response: dict) -> tuple[dict, bool]:
+        now = self.clock()
+        blob = json.dumps(response, separators=(",", ":"))
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO idempotency (key, response, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET response = excluded.response, expires_at = excluded.expires_at "
+                "WHERE idempotency.expires_at <= ?",
+                (key, blob, now + self.ttl_s, now),
+            )
+            created = cur.rowcount == 1
+            if not created:
+                row = self._db.execute("SELECT response FROM idempotency WHERE key = ?", (key,)).fetchone()
+                self.hits += 1
+            self._claims += 1
+            if self._claims % self.sweep_every == 0:
+                self._db.execute("DELETE FROM idempotency WHERE expires_at <= ?", (now,))
+        return (response, True) if created else (json.loads(row[0]), False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM idempotency").fetchone()[0]
+        return {"backend": "sqlite", "entries": entries, "hits": self.hits}
+
+
+@lru_cache(maxsize=1)
+def idempotency_store() -> IdempotencyStore:
+    """
+    IDEMPOTENCY_STORE=memory (default) | sqlite, IDEMPOTENCY_TTL_S (default 1 day),
+    IDEMPOTENCY_MAX_BYTES (memory budget, default 16 MiB), IDEMPOTENCY_SQLITE_PATH.
+    """
+    backend = os.getenv("IDEMPOTENCY_STORE", "memory").lower()
+    ttl_s = float(os.getenv("IDEMPOTENCY_TTL_S", "86400"))
+    if backend == "sqlite":
+        return SqliteIdempotencyStore(
+            os.getenv("IDEMPOTENCY_SQLITE_PATH", "clarity_clean_analysis/02_output/idempotency.sqlite"), ttl_s
+        )
+    if backend != "memory":
+        raise ValueError(f"IDEMPOTENCY_STORE must be 'memory' or 'sqlite', got {backend!r}")
+    return MemoryIdempotencyStore(max_bytes=int(os.getenv("IDEMPOTENCY_MAX_BYTES", str(16 << 20))), ttl_s=ttl_s)
@@ -1,33 +1,291 @@
+import base64
 import hashlib
+import json
+import logging
+import uuid
 from datetime import datetime
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, bindparam, insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
 
-from api.models import InteractionLog
-from api.schemas.interaction import InteractionCreate
+from api.models import InteractionDedupe, InteractionLog, InteractionLogSeq
+from api.schemas.interaction import InteractionCreate, InteractionRead, InteractionReadWithPayload
+from api.services.lineage import lineage_cache
+from api.services.payload_codec import CodecError, decode_payload, payload_codec
+
+log = logging.getLogger(__name__)
+
+# Rows per upsert / IN (...) chunk; stays well under SQLite's and asyncpg's bind-parameter limits
+DEDUPE_CHUNK = 500
+
+
+def encode_payload(payload) -> bytes:
+    # str payloads hash exactly as before; structured payloads hash their canonical JSON
+    if isinstance(payload, bytes):
+        return payload
+    if isinstance(payload, str):
+        return payload.encode("utf-8")
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
 
 
 def create_interaction(db: Session, interaction: InteractionCreate) -> tuple[InteractionLog, bool]:
-    payload_bytes = interaction.payload.encode("utf-8")
-    payload_hash = hashlib.sha256(payload_bytes).hexdigest()
-
-    # Idempotency check
-    existing = db.query(InteractionLog).filter(InteractionLog.payload_hash == payload_hash).first()
-    if existing:
-        return existing, False
-
-    # Create new interaction
-    db_interaction = InteractionLog(
-        payload_hash=payload_hash,
-        emitted_at_utc=datetime.utcnow(),
-        agent_id=interaction.agent_id,
-        action_type=interaction.action_type,
-        agent_support=interaction.details,  # Map incoming details to agent_support
-        causality_id=interaction.causality_id,  # Handle optional (defaults to None)
-        environment_hash=interaction.environment_hash,
-        payload=payload_bytes,  # Pass the encoded bytes to constructor
+    # Idempotency via interaction_dedupe: one upsert claims the hash, then insert or fetch
+    return create_interactions_bulk(db, [interaction])[0]
+
+
+async def create_interaction_async(db: AsyncSession, interaction: InteractionCreate) -> tuple[InteractionLog, bool]:
+    """create_interaction on an AsyncSession (DB_ASYNC routes); same statements, awaited."""
+    return await db.run_sync(create_interaction, interaction)
+
+
+def _claim_hashes(db: Session, claims: list[dict]) -> dict[str, tuple[uuid.UUID, datetime]]:
+    """
+    Claim payload hashes in interaction_dedupe; returns hash → (interaction_id, emitted_at_utc)
+    of whichever row owns it. One INSERT ... ON CONFLICT (payload_hash) DO UPDATE ... RETURNING
+    per chunk: the no-op update makes conflicting rows come back too, carrying the owner's id,
+    so a claim is ours iff the id matches. The primary key serialises concurrent claims.
+    """
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql":
+        upsert = pg_insert
+    elif dialect.name == "sqlite" and dialect.insert_returning:  # RETURNING needs SQLite 3.35+
+        upsert = sqlite_insert
+    else:
+        return _claim_hashes_fallback(db, claims)
+
+    t = InteractionDedupe.__table__
+    owners = {}
+    # Lock claim rows in one global order, so overlapping bulks can't each hold what the other waits on
+    claims = sorted(claims, key=lambda c: c["payload_hash"])
+    for i in range(0, len(claims), DEDUPE_CHUNK):
+        stmt = upsert(t).values(claims[i : i + DEDUPE_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[t.c.payload_hash], set_={"payload_hash": stmt.excluded.payload_hash}
+        ).returning(t.c.payload_hash, t.c.interaction_id, t.c.emitted_at_utc)
+        for payload_hash, interaction_id, emitted_at in db.execute(stmt):
+            owners[payload_hash] = (interaction_id, emitted_at)
+    return owners
+
+
+def _claim_hashes_fallback(db: Session, claims: list[dict]) -> dict[str, tuple[uuid.UUID, datetime]]:
+    # Dialects without upsert + RETURNING: read, then insert the misses (the PK still rejects a racer)
+    t = InteractionDedupe.__table__
+    owners = {}
+    for i in range(0, len(claims), DEDUPE_CHUNK):
+        chunk = [c["payload_hash"] for c in claims[i : i + DEDUPE_CHUNK]]
+        for payload_hash, interaction_id, emitted_at in db.execute(
+            select(t.c.payload_hash, t.c.interaction_id, t.c.emitted_at_utc).where(t.c.payload_hash.in_(chunk))
+        ):
+            owners[payload_hash] = (interaction_id, emitted_at)
+    missing = [c for c in claims if c["payload_hash"] not in owners]
+    if missing:
+        db.execute(insert(t), missing)
+        owners.update((c["payload_hash"], (c["interaction_id"], c["emitted_at_utc"])) for c in missing)
+    return owners
+
+
+def _rows_by_key(db: Session, keys: list[tuple[uuid.UUID, datetime]]) -> dict[uuid.UUID, InteractionLog]:
+    # (id, emitted_at_utc) is the full primary key, so each chunk is a pruned PK lookup
+    found = {}
+    pk = tuple_(InteractionLog.id, InteractionLog.emitted_at_utc)
+    for i in range(0, len(keys), DEDUPE_CHUNK):
+        for row in db.scalars(select(InteractionLog).where(pk.in_(keys[i : i + DEDUPE_CHUNK]))):
+            found[row.id] = row
+    return found
+
+
+def _reserve_seq(db: Session, n: int) -> int:
+    """
+    Reserve n interaction_log.seq values; returns the first. The counter row stays locked until
+    our commit, so concurrent writers commit in seq order and readers only ever see a prefix.
+    """
+    t = InteractionLogSeq.__table__
+    if db.execute(update(t).where(t.c.id == 1).values(last=t.c.last + n)).rowcount == 0:
+        db.execute(insert(t).values(id=1, last=n))  # fresh database (the migration seeds it)
+    return db.scalar(select(t.c.last).where(t.c.id == 1)) - n + 1
+
+
+def _repoint_orphans(db: Session, orphans, owners, proposed, now, ours, existing) -> None:
+    """
+    Take over orphaned claims, each only if it still names the owner we saw: two submitters
+    racing on the same orphan both try, the row lock makes the second re-check the WHERE,
+    and only one UPDATE matches. The loser reads the new owner and answers as a duplicate.
+    """
+    t = InteractionDedupe.__table__
+    stmt = (
+        update(t)
+        .where(t.c.payload_hash == bindparam("h"), t.c.interaction_id == bindparam("old_iid"))
+        .values(interaction_id=bindparam("iid"), emitted_at_utc=bindparam("at"))
     )
-    db.add(db_interaction)
+    lost = []
+    for h in sorted(orphans):  # same lock order as _claim_hashes
+        params = {"h": h, "old_iid": owners[h][0], "iid": proposed[h]["interaction_id"], "at": now}
+        if db.execute(stmt, params).rowcount == 1:
+            ours.add(h)
+        else:
+            lost.append(h)
+    if lost:
+        for payload_hash, interaction_id, emitted_at in db.execute(
+            select(t.c.payload_hash, t.c.interaction_id, t.c.emitted_at_utc).where(t.c.payload_hash.in_(lost))
+        ):
+            owners[payload_hash] = (interaction_id, emitted_at)
+        existing.update(_rows_by_key(db, [owners[h] for h in lost]))
+
+
+def create_interactions_bulk(db: Session, interactions: list[InteractionCreate]) -> list[tuple[InteractionLog, bool]]:
+    """
+    Batched create_interaction: hashes are claimed in interaction_dedupe with one upsert per
+    DEDUPE_CHUNK, new rows go in as one multi-row INSERT, owners of duplicate hashes are
+    fetched by primary key, and everything commits once. Returns (row, created) in input
+    order; repeats of a payload within the same batch resolve to the first occurrence.
+    """
+    if not interactions:
+        return []
+
+    blobs = [encode_payload(i.payload) for i in interactions]
+    hashes = [hashlib.sha256(b).hexdigest() for b in blobs]
+
+    now = datetime.utcnow()
+    proposed: dict[str, dict] = {}
+    for payload_hash in hashes:
+        if payload_hash not in proposed:
+            proposed[payload_hash] = {
+                "payload_hash": payload_hash,
+                "interaction_id": uuid.uuid4(),
+                "emitted_at_utc": now,
+            }
+    owners = _claim_hashes(db, list(proposed.values()))
+    ours = {h for h, (iid, _) in owners.items() if iid == proposed[h]["interaction_id"]}
+    existing = _rows_by_key(db, [owners[h] for h in owners if h not in ours])
+
+    # A claim whose row is gone (partition expired before its dedupe row was swept) is re-pointed
+    orphans = [h for h in owners if h not in ours and owners[h][0] not in existing]
+    if orphans:
+        _repoint_orphans(db, orphans, owners, proposed, now, ours, existing)
+
+    codec = payload_codec()
+    rows: dict[str, InteractionLog] = {}
+    out: list[tuple[InteractionLog, bool]] = []
+    for interaction, payload_bytes, payload_hash in zip(interactions, blobs, hashes, strict=True):
+        if payload_hash not in ours:
+            out.append((existing[owners[payload_hash][0]], False))
+            continue
+        if payload_hash in rows:
+            out.append((rows[payload_hash], False))
+            continue
+        # payload_hash is over the uncompressed bytes; only the stored column is compressed
+        codec_id, stored = codec.encode(payload_bytes)
+        row = rows[payload_hash] = InteractionLog(
+            id=proposed[payload_hash]["interaction_id"],
+            payload_hash=payload_hash,
+            emitted_at_utc=now,
+            agent_id=interaction.agent_id,
+            action_type=interaction.action_type,
+            agent_support=interaction.details,  # Map incoming details to agent_support
+            causality_id=interaction.causality_id,
+            environment_hash=interaction.environment_hash,
+            payload=stored,
+            payload_codec=codec_id,
+        )
+        out.append((row, True))
+
+    if rows:
+        # Taken last (after the dedupe claims) so every writer locks in the same order
+        first = _reserve_seq(db, len(rows))
+        for offset, row in enumerate(rows.values()):
+            row.seq = first + offset
+        # Core executemany: SQLAlchemy folds this into multi-row INSERT ... VALUES batches
+        db.execute(
+            insert(InteractionLog),
+            [{c.key: getattr(r, c.key) for c in InteractionLog.__table__.columns} for r in rows.values()],
+        )
+    # Detach the looked-up rows so commit() doesn't expire them into one SELECT each on serialization
+    for row in existing.values():
+        db.expunge(row)
     db.commit()
-    db.refresh(db_interaction)
-    return db_interaction, True
+    cache = lineage_cache()
+    if cache is not None:
+        for row in rows.values():
+            cache.added(row.id, row.causality_id)
+    return out
+
+
+def encode_cursor(row: InteractionLog) -> str:
+    """Opaque keyset cursor: the (emitted_at_utc, id) of the last row on a page."""
+    raw = f"{row.emitted_at_utc.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Inverse of encode_cursor; raises ValueError on anything malformed."""
+    try:
+        emitted, row_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(emitted), uuid.UUID(row_id)
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+
+def interaction_query(
+    *,
+    after: tuple[datetime, uuid.UUID] | None = None,
+    agent_id: uuid.UUID | None = None,
+    causality_id: uuid.UUID | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    include_payload: bool = False,
+) -> Select:
+    """
+    Keyset-ordered SELECT over interaction_log, in pk_interaction_log order
+    (emitted_at_utc, id). Paging continues strictly after `after` rather than with OFFSET,
+    so every page is an index range scan; the time bounds also let Postgres prune
+    partitions. The LargeBinary payload column stays deferred unless asked for.
+    """
+    stmt = select(InteractionLog).order_by(InteractionLog.emitted_at_utc, InteractionLog.id)
+    if not include_payload:
+        stmt = stmt.options(defer(InteractionLog.payload))
+    if after is not None:
+        stmt = stmt.where(tuple_(InteractionLog.emitted_at_utc, InteractionLog.id) > tuple_(*after))
+    if agent_id is not None:
+        stmt = stmt.where(InteractionLog.agent_id == agent_id)
+    if causality_id is not None:
+        stmt = stmt.where(InteractionLog.causality_id == causality_id)
+    if since is not None:
+        stmt = stmt.where(InteractionLog.emitted_at_utc >= since)
+    if until is not None:
+        stmt = stmt.where(InteractionLog.emitted_at_utc < until)
+    return stmt
+
+
+def list_interactions(db: Session, *, limit: int, **filters) -> tuple[list[InteractionLog], str | None]:
+    """One page of interaction_query(**filters) plus the cursor for the next page (None at the end)."""
+    return _page(list(db.scalars(interaction_query(**filters).limit(limit + 1))), limit)
+
+
+async def list_interactions_async(
+    db: AsyncSession, *, limit: int, **filters
+) -> tuple[list[InteractionLog], str | None]:
+    """list_interactions on an AsyncSession (DB_ASYNC routes)."""
+    return _page(list(await db.scalars(interaction_query(**filters).limit(limit + 1))), limit)
+
+
+def read_row(row: InteractionLog, include_payload: bool = False) -> InteractionRead:
+    """API view of a row; the payload is decompressed here, and only when asked for."""
+    fields = InteractionRead.model_validate(row).model_dump()
+    if not include_payload:
+        return InteractionRead(**fields)
+    try:
+        raw = decode_payload(row.payload_codec, row.payload)
+    except CodecError as e:
+        log.warning("interaction %s: payload not decodable: %s", row.id, e)
+        return InteractionReadWithPayload(**fields, payload=None, payload_error=str(e))
+    return InteractionReadWithPayload(**fields, payload=raw.decode("utf-8", errors="replace"))
+
+
+def _page(rows: list[InteractionLog], limit: int) -> tuple[list[InteractionLog], str | None]:
+    # one extra row was fetched to learn whether another page exists
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
@@ -0,0 +1,197 @@
+# api/services/lineage.py
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import lru_cache
+
+from sqlalchemy import Select, func, literal, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+from api.models import InteractionLog
+
+# Everything InteractionRead needs; the payload never rides along a lineage walk
+_COLS = (
+    "id",
+    "causality_id",
+    "emitted_at_utc",
+    "agent_id",
+    "action_type",
+    "environment_hash",
+    "payload_hash",
+    "agent_support",
+)
+
+
+def _cols(entity) -> list:
+    return [getattr(entity, c) for c in _COLS]
+
+
+def lineage_query(root_id: uuid.UUID, depth: int, max_nodes: int) -> Select:
+    """
+    One statement, two recursive CTEs: ancestors follow causality_id upward (depth -1, -2, ...),
+    descendants follow rows whose causality_id points at the frontier (1, 2, ...). The root
+    comes back once at depth 0. Capped at `max_nodes` + 1 rows, nearest (|depth|) first, so a
+    truncated walk keeps the root and its closest neighbours and callers can tell truncation.
+    """
+    L = InteractionLog
+    parent, child = aliased(L), aliased(L)
+
+    anc = select(*_cols(L), literal(0).label("depth")).where(L.id == root_id).cte("ancestors", recursive=True)
+    anc = anc.union_all(
+        select(*_cols(parent), (anc.c.depth - 1).label("depth")).where(
+            parent.id == anc.c.causality_id, anc.c.depth > -depth
+        )
+    )
+    desc = select(*_cols(L), literal(0).label("depth")).where(L.id == root_id).cte("descendants", recursive=True)
+    desc = desc.union_all(
+        select(*_cols(child), (desc.c.depth + 1).label("depth")).where(
+            child.causality_id == desc.c.id, desc.c.depth < depth
+        )
+    )
+    both = union_all(select(anc).where(anc.c.depth < 0), select(desc)).subquery()
+    nearest = (func.abs(both.c.depth), both.c.depth, both.c.emitted_at_utc, both.c.id)
+    return select(both).order_by(*nearest).limit(max_nodes + 1)
+
+
+def fetch_lineage(db: Session, root_id: uuid.UUID, depth: int, max_nodes: int) -> tuple[list[dict], bool]:
+    """(nodes, truncated); nodes are column dicts plus a signed `depth`, ancestors to descendants."""
+    rows = db.execute(lineage_query(root_id, depth, max_nodes)).mappings().all()
+    nodes, seen = [], set()
+    for r in rows[:max_nodes]:
+        if r["id"] in seen:  # only a causality cycle reaches a node twice; rows are nearest first, keep that one
+            continue
+        seen.add(r["id"])
+        nodes.append(dict(r))
+    nodes.sort(key=lambda n: (n["depth"], n["emitted_at_utc"], n["id"]))
+    return nodes, len(rows) > max_nodes
+
+
+class AdjacencyCache:
+    """
+    Bounded LRU of node → (row, children) for hot causal chains, with a TTL.
+
+    Parents come free with every row (causality_id); a node's children list is only stored
+    once a walk has enumerated them completely, and is reset to unknown whenever a new child
+    is created in this process. Other workers' inserts are only picked up after `ttl_s`.
+    Dangling causality_ids (parent not in the table) are cached as row-less entries.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl_s: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._nodes: OrderedDict[uuid.UUID, tuple[float, dict | None, tuple[uuid.UUID, ...] | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, node_id, now):
+        entry = self._nodes.get(node_id)
+        if entry is None or entry[0] <= now:
+            return None
+        self._nodes.move_to_end(node_id)
+        return entry
+
+    def walk(self, root_id: uuid.UUID, depth: int) -> list[dict] | None:
+        """The same nodes fetch_lineage would return, or None if any part of the walk isn't cached."""
+        now = self.clock()
+        with self._lock:
+            root = self._get(root_id, now)
+            if root is None or root[1] is None:
+                self.misses += 1
+                return None
+            ancestors, node = [], root
+            for d in range(1, depth + 1):
+                parent_id = node[1]["causality_id"]
+                if parent_id is None:
+                    break
+                node = self._get(parent_id, now)
+                if node is None:
+                    self.misses += 1
+                    return None
+                if node[1] is None:  # known dangling causality_id: the chain ends here
+                    break
+                ancestors.append({**node[1], "depth": -d})
+            out, frontier = [{**root[1], "depth": 0}], [root]
+            for d in range(1, depth + 1):
+                nxt = []
+                for entry in frontier:
+                    if entry[2] is None:
+                        self.misses += 1
+                        return None
+                    for cid in entry[2]:
+                        c = self._get(cid, now)
+                        if c is None:
+                            self.misses += 1
+                            return None
+                        nxt.append(c)
+                out += [{**c[1], "depth": d} for c in sorted(nxt, key=lambda e: (e[1]["emitted_at_utc"], e[1]["id"]))]
+                frontier = nxt
+            self.hits += 1
+        return list(reversed(ancestors)) + out
+
+    def put(self, nodes: list[dict], depth: int) -> None:
+        """Record a complete (untruncated) walk; children are known for every node above the horizon."""
+        now = self.clock()
+        children: dict[uuid.UUID, list[uuid.UUID]] = {n["id"]: [] for n in nodes if 0 <= n["depth"] < depth}
+        for n in nodes:
+            if n["depth"] > 0 and n["causality_id"] in children:
+                children[n["causality_id"]].append(n["id"])
+        with self._lock:
+            for n in nodes:
+                row = {k: n[k] for k in _COLS}
+                known = tuple(children[n["id"]]) if n["id"] in children else None
+                expires = now + self.ttl_s
+                old = self._nodes.get(n["id"])
+                if known is None and old is not None and old[0] > now and old[2] is not None:
+                    # keep a still-valid children list learned by another walk, with the expiry it came with
+                    known, expires = old[2], old[0]
+                self._nodes[n["id"]] = (expires, row, known)
+                self._nodes.move_to_end(n["id"])
+            ids = {n["id"] for n in nodes}
+            for n in nodes:
+                # the walk looked for this parent and it isn't there
+                if n["depth"] <= 0 and n["depth"] > -depth and n["causality_id"] not in (None, *ids):
+                    self._nodes[n["causality_id"]] = (now + self.ttl_s, None, ())
+            while len(self._nodes) > self.maxsize:
+                self._nodes.popitem(last=False)
+
+    def added(self, node_id: uuid.UUID, parent_id: uuid.UUID | None) -> None:
+        """A row was created: forget it as dangling, and its parent's children list is stale."""
+        with self._lock:
+            entry = self._nodes.get(node_id)
+            if entry is not None and entry[1] is None:
+                del self._nodes[node_id]
+            entry = self._nodes.get(parent_id) if parent_id is not None else None
+            if entry is not None:
+                self._nodes[parent_id] = (entry[0], entry[1], None)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._nodes), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+@lru_cache(maxsize=1)
+def lineage_cache() -> AdjacencyCache | None:
+    """LINEAGE_CACHE_SIZE nodes (default 0 = off), LINEAGE_CACHE_TTL_S (default 30)."""
+    size = int(os.getenv("LINEAGE_CACHE_SIZE", "0"))
+    if size <= 0:
+        return None
+    return AdjacencyCache(maxsize=size, ttl_s=float(os.getenv("LINEAGE_CACHE_TTL_S", "30")))
+
+
+def lineage(db: Session, root_id: uuid.UUID, depth: int, max_nodes: int) -> tuple[list[dict], bool]:
+    """Cached walk when the whole neighbourhood is hot, else one recursive-CTE round trip."""
+    cache = lineage_cache()
+    if cache is not None:
+        nodes = cache.walk(root_id, depth)
+        if nodes is not None and len(nodes) <= max_nodes:
+            return nodes, False
+    nodes, truncated = fetch_lineage(db, root_id, depth, max_nodes)
+    if cache is not None and nodes and not truncated:
+        cache.put(nodes, depth)
+    return nodes, truncated
@@ -0,0 +1,324 @@
+# api/services/merkle_log.py
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from api.models import InteractionLog
+from api.truthrun.merkle import MerkleAccumulator
+
+# Optional: POSIX advisory lock so only one worker writes a MERKLE_LOG_DIR
+try:
+    import fcntl
+except Exception:
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+LEAF = 32  # sha256 digest bytes
+SYNC_CHUNK = 5000  # rows per keyset page when catching up with interaction_log
+
+
+class LeafIndex:
+    """
+    leaf digest → position, without a Python object per leaf: the 8-byte prefixes of the
+    leaves sit sorted in a uint64 array next to their positions (16 B/leaf), and a prefix hit
+    is confirmed against the leaf itself. Appends go to a small dict that is folded into the
+    arrays once it outgrows 1/8 of them, so re-sorting stays amortised O(log n) per leaf.
+    """
+
+    def __init__(self, leaves: np.ndarray):
+        self._leaves = leaves  # (n, 32) uint8 view the positions point into
+        self._recent: dict[bytes, int] = {}
+        self._build(len(leaves))
+
+    def _build(self, n: int) -> None:
+        keys = np.ascontiguousarray(self._leaves[:n, :8]).view(">u8").ravel().astype(np.uint64)
+        self._pos = np.argsort(keys, kind="stable")
+        self._keys = keys[self._pos]
+        self._recent.clear()
+
+    def get(self, leaf: bytes) -> int | None:
+        hit = self._recent.get(leaf)
+        if hit is not None:
+            return hit
+        key = np.uint64(int.from_bytes(leaf[:8], "big"))
+        lo, hi = np.searchsorted(self._keys, key, "left"), np.searchsorted(self._keys, key, "right")
+        for pos in self._pos[lo:hi]:
+            if self._leaves[pos].tobytes() == leaf:
+                return int(pos)
+        return None
+
+    def add(self, leaf: bytes, pos: int, leaves: np.ndarray) -> None:
+        self._leaves = leaves  # the accumulator may have grown (re-allocated) its level 0
+        self._recent[leaf] = pos
+        if len(self._recent) > max(4096, len(self._keys) // 8):
+            self._build(pos + 1)
+
+
+class MerkleLog:
+    """
+    Transparency log over interaction_log payload_hashes, in commit (seq) order.
+
+    interaction_log.seq is reserved under a row lock held until commit, so what a reader sees
+    is always a prefix of seq and sync() can page past its cursor without skipping late
+    commits. Every worker that has caught up to the same seq holds the same tree, rows from
+    before anchoring was switched on included, and the root and any inclusion proof are
+    O(log n) away. sync() runs on a background thread (start()); requests only read.
+
+    With a `directory`, the worker holding its lock appends leaves to `leaves.bin` and a
+    checkpoint line {tree_size, root, frontier, seq, ts} to `checkpoints.jsonl` every
+    `checkpoint_every` leaves or `checkpoint_s` seconds. Every worker starts by replaying the
+    leaves up to the last checkpoint (the others read-only) and then catches up from its seq,
+    so leaves whose partitions retention has since dropped stay in everyone's tree. Without
+    one, each worker rebuilds from the table and checkpoints only in memory.
+
+    Issued proofs are kept in an LRU of `proof_cache` entries keyed by leaf; an entry is only
+    served while the tree is still the size it was issued at.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] | None = None,
+        directory: str | Path | None = None,
+        checkpoint_every: int = 1024,
+        checkpoint_s: float = 60.0,
+        proof_cache: int = 1024,
+        sync_every_s: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.session_factory = session_factory
+        self.directory = Path(directory) if directory else None
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_s = checkpoint_s
+        self.sync_every_s = sync_every_s
+        self.clock = clock
+        self.proof_cache = proof_cache
+        self.proof_hits = 0
+        self.proof_misses = 0
+        self.sync_failures = 0
+        self._proofs: OrderedDict[str, dict] = OrderedDict()
+        self.acc = MerkleAccumulator()
+        self.checkpoint: dict | None = None
+        self.cursor = 0  # highest interaction_log.seq taken in
+        self._last_checkpoint_at = clock()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._leaves = None
+        self._owner = None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._owner = self._claim_directory()
+            self._replay()
+            if self._owner is not None:
+                self._leaves = open(self.directory / "leaves.bin", "ab")
+        self._index = LeafIndex(self.acc.level(0))
+
+    def _claim_directory(self):
+        f = open(self.directory / "owner.lock", "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                log.info("merkle log %s is owned by another worker; replaying it read-only", self.directory)
+                return None
+        return f
+
+    def _replay(self) -> None:
+        # resume from the last checkpoint; leaves past it are re-synced from the table
+        cp = self.directory / "checkpoints.jsonl"
+        lines = cp.read_text(encoding="utf-8").splitlines() if cp.exists() else []
+        self.checkpoint = json.loads(lines[-1]) if lines else None
+        size = self.checkpoint["tree_size"] if self.checkpoint else 0
+        path = self.directory / "leaves.bin"
+        raw = np.fromfile(path, dtype=np.uint8, count=size * LEAF) if size else np.empty(0, dtype=np.uint8)
+        if len(raw) < size * LEAF:
+            raise ValueError(f"merkle log {path} holds {len(raw) // LEAF} leaves, checkpoint says {size}")
+        if self._owner is not None and path.exists() and path.stat().st_size > size * LEAF:
+            log.info("merkle log %s: dropping leaves past the last checkpoint", path)
+            with path.open("r+b") as f:
+                f.truncate(size * LEAF)
+        # leaves.bin never holds a hash twice (_add skips repeats), so the tree loads in one pass
+        self.acc = MerkleAccumulator(raw.reshape(-1, LEAF))
+        self.cursor = int(self.checkpoint.get("seq", 0)) if self.checkpoint else 0
+
+    def _add(self, leaf: bytes) -> bool:
+        if self._index.get(leaf) is not None:  # an orphaned claim re-ingested after its partition expired
+            return False
+        self._index.add(leaf, self.acc.append(leaf), self.acc.level(0))
+        return True
+
+    def append_many(self, payload_hashes: Iterable[str], seq: int | None = None) -> int:
+        """Log payload_hashes (hex) in order, up to interaction_log.seq `seq`; returns how many were new."""
+        with self._lock:
+            new = [leaf for leaf in map(bytes.fromhex, payload_hashes) if self._add(leaf)]
+            if seq is not None:
+                self.cursor = seq
+            if new and self._leaves is not None:
+                self._leaves.write(b"".join(new))
+                self._leaves.flush()
+            self._maybe_checkpoint()
+        return len(new)
+
+    def _maybe_checkpoint(self) -> None:
+        pending = len(self.acc) - (self.checkpoint["tree_size"] if self.checkpoint else 0)
+        if pending >= self.checkpoint_every or (
+            pending and self.clock() - self._last_checkpoint_at >= self.checkpoint_s
+        ):
+            self._checkpoint()
+
+    def sync(self) -> int:
+        """Take in interaction_log rows past the cursor, in seq order; returns leaves added."""
+        if self.session_factory is None:
+            return 0
+        added = 0
+        with self._sync_lock:
+            try:
+                with self.session_factory() as db:
+                    while True:
+                        rows = db.execute(
+                            select(InteractionLog.payload_hash, InteractionLog.seq)
+                            .where(InteractionLog.seq > self.cursor)
+                            .order_by(InteractionLog.seq)
+                            .limit(SYNC_CHUNK)
+                        ).all()
+                        if rows:
+                            added += self.append_many((r[0] for r in rows), seq=rows[-1][1])
+                        if len(rows) < SYNC_CHUNK:
+                            break
+            except Exception:
+                self.sync_failures += 1
+                log.warning("merkle log sync failed; serving the tree as of the last sync", exc_info=True)
+            with self._lock:
+                if self.checkpoint is None and len(self.acc):
+                    self._checkpoint()  # anchor a root as soon as the first catch-up is in
+                else:
+                    self._maybe_checkpoint()  # a quiet log still gets its time-paced checkpoint
+        return added
+
+    def start(self) -> None:
+        """Sync now and then every `sync_every_s` on a daemon thread, off the request path."""
+        if self._thread is None and self.session_factory is not None:
+            self._thread = threading.Thread(target=self._run, name="merkle-log-sync", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self.sync()
+            if self._stop.wait(self.sync_every_s):
+                return
+
+    def _checkpoint(self) -> dict:
+        self.checkpoint = {
+            "tree_size": len(self.acc),
+            "root": self.acc.root().hex(),
+            "frontier": [f.hex() for f in self.acc.frontier],
+            "seq": self.cursor,
+            "ts": datetime.now(UTC).isoformat(),
+        }
+        self._last_checkpoint_at = self.clock()
+        if self._leaves is not None:
+            os.fsync(self._leaves.fileno())  # leaves up to tree_size are durable before the root is
+            with (self.directory / "checkpoints.jsonl").open("a", encoding="utf-8") as f:
+                f.write(json.dumps(self.checkpoint, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        return self.checkpoint
+
+    def anchored_root(self) -> str:
+        """Root hex of the latest checkpoint ("" before the first); never writes."""
+        checkpoint = self.checkpoint
+        return checkpoint["root"] if checkpoint else ""
+
+    def proof(self, payload_hash: str) -> dict | None:
+        """Inclusion proof against the current root, or None if the hash isn't logged (yet)."""
+        with self._lock:
+            cached = self._proofs.get(payload_hash)
+            if cached is not None and cached["tree_size"] == len(self.acc):
+                self._proofs.move_to_end(payload_hash)
+                self.proof_hits += 1
+                return cached
+            index = self._index.get(bytes.fromhex(payload_hash))
+            if index is None:
+                return None
+            self.proof_misses += 1
+            issued = {
+                "leaf": payload_hash,
+                "index": index,
+                "tree_size": len(self.acc),
+                "root": self.acc.root().hex(),
+                "path": [p.hex() for p in self.acc.proof(index)],
+            }
+            if self.proof_cache > 0:
+                self._proofs[payload_hash] = issued
+                self._proofs.move_to_end(payload_hash)
+                while len(self._proofs) > self.proof_cache:
+                    self._proofs.popitem(last=False)
+            return issued
+
+    def stats(self) -> dict:
+        return {
+            "tree_size": len(self.acc),
+            "frontier": len(self.acc.frontier),
+            "checkpoint_size": self.checkpoint["tree_size"] if self.checkpoint else 0,
+            "seq": self.cursor,
+            "persisted": self._leaves is not None,
+            "sync_failures": self.sync_failures,
+            "proof_cache_entries": len(self._proofs),
+            "proof_cache_hits": self.proof_hits,
+            "proof_cache_misses": self.proof_misses,
+        }
+
+    def close(self) -> None:
+        """Stop syncing and checkpoint whatever was taken in since the last root."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(10.0)
+        with self._lock:
+            if self.checkpoint is None or self.checkpoint["tree_size"] != len(self.acc):
+                if len(self.acc):
+                    self._checkpoint()
+            if self._leaves is not None:
+                self._leaves.close()
+                self._leaves = None
+            if self._owner is not None:
+                self._owner.close()  # releases the directory lock
+                self._owner = None
+
+
+@lru_cache(maxsize=1)
+def merkle_log() -> MerkleLog | None:
+    """
+    On with MERKLE_ANCHOR_ENABLED=True; built from interaction_log in seq order. MERKLE_LOG_DIR
+    persists leaves and checkpoints (one writing worker, the rest replay it; unset = every
+    worker rebuilds from the table on start); MERKLE_SYNC_S (default 1) paces the catch-up,
+    MERKLE_CHECKPOINT_EVERY (leaves, default 1024) and MERKLE_CHECKPOINT_S (default 60) the
+    checkpoints; MERKLE_PROOF_CACHE sizes the issued-proof LRU (default 1024, 0 = off).
+    """
+    if os.getenv("MERKLE_ANCHOR_ENABLED") != "True":
+        return None
+    from api.database import SessionLocal
+
+    return MerkleLog(
+        SessionLocal,
+        directory=os.getenv("MERKLE_LOG_DIR") or None,
+        checkpoint_every=int(os.getenv("MERKLE_CHECKPOINT_EVERY", "1024")),
+        checkpoint_s=float(os.getenv("MERKLE_CHECKPOINT_S", "60")),
+        proof_cache=int(os.getenv("MERKLE_PROOF_CACHE", "1024")),
+        sync_every_s=float(os.getenv("MERKLE_SYNC_S", "1")),
+    )
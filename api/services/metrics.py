@@ -0,0 +1,66 @@
+# api/services/metrics.py
+from __future__ import annotations
+
+from bisect import bisect_left
+
+# ms; 150 matches the p95 gate in scripts/ann_diag.py so alerts can use le="150"
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 150, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus semantics: cumulative `le` buckets)."""
+
+    __slots__ = ("counts", "total", "sum_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)  # last slot = +Inf
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+
+
+class RequestMetrics:
+    """Per (route, method, status) histograms. Mutated and rendered on the event loop only."""
+
+    def __init__(self):
+        self.histograms: dict[tuple[str, str, int], Histogram] = {}
+
+    def observe(self, route: str, method: str, status: int, ms: float) -> None:
+        key = (route, method, status)
+        h = self.histograms.get(key)
+        if h is None:
+            h = self.histograms[key] = Histogram()
+        h.observe(ms)
+
+    def render(self) -> list[str]:
+        name = "http_request_duration_ms"
+        out = [f"# HELP {name} Request latency by route template and status.", f"# TYPE {name} histogram"]
+        for (route, method, status), h in sorted(self.histograms.items()):
+            labels = f'route="{_esc(route)}",method="{method}",status="{status}"'
+            cum = 0
+            for bound, n in zip(LATENCY_BUCKETS_MS, h.counts, strict=False):
+                cum += n
+                out.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cum}')
+            out.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.total}')
+            out.append(f"{name}_sum{{{labels}}} {h.sum_ms:.3f}")
+            out.append(f"{name}_count{{{labels}}} {h.total}")
+        return out
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_gauges(metrics: dict[str, tuple[str, str, float]], labels: dict[str, str] | None = None) -> list[str]:
+    """{name: (type, help, value)} → Prometheus text lines, with optional shared labels."""
+    lbl = ""
+    if labels:
+        lbl = "{" + ",".join(f'{k}="{_esc(str(v))}"' for k, v in labels.items()) + "}"
+    out = []
+    for name, (kind, help_, value) in metrics.items():
+        out += [f"# HELP {name} {help_}", f"# TYPE {name} {kind}", f"{name}{lbl} {value:g}"]
+    return out
@@ -0,0 +1,161 @@
+# api/services/partitions.py
+from __future__ import annotations
+
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+PARENT = "interaction_log"
+_NAME = re.compile(rf"^{PARENT}_p(\d{{6}}|\d{{8}})$")
+
+
+@dataclass(frozen=True)
+class PartitionPolicy:
+    """
+    Range partitions of interaction_log on emitted_at_utc.
+
+    granularity  "day" or "month"
+    premake      periods created ahead of the current one (inserts never hit a missing range)
+    lookback     periods kept open behind the current one for late-arriving events
+    retention    periods of history to keep; older partitions expire (None = keep forever)
+    expire       "detach" (keep the table for archiving) or "drop"
+    """
+
+    granularity: str = "day"
+    premake: int = 7
+    lookback: int = 1
+    retention: int | None = None
+    expire: str = "detach"
+
+    def __post_init__(self):
+        if self.granularity not in ("day", "month"):
+            raise ValueError(f"granularity must be 'day' or 'month', got {self.granularity!r}")
+        if self.expire not in ("detach", "drop"):
+            raise ValueError(f"expire must be 'detach' or 'drop', got {self.expire!r}")
+
+    @classmethod
+    def from_env(cls) -> PartitionPolicy:
+        """INTERACTION_PARTITION_{GRANULARITY,PREMAKE,LOOKBACK,RETENTION,EXPIRE}."""
+        retention = os.getenv("INTERACTION_PARTITION_RETENTION")
+        return cls(
+            granularity=os.getenv("INTERACTION_PARTITION_GRANULARITY", "day"),
+            premake=int(os.getenv("INTERACTION_PARTITION_PREMAKE", "7")),
+            lookback=int(os.getenv("INTERACTION_PARTITION_LOOKBACK", "1")),
+            retention=int(retention) if retention else None,
+            expire=os.getenv("INTERACTION_PARTITION_EXPIRE", "detach"),
+        )
+
+
+def _period_start(granularity: str, ts: datetime) -> datetime:
+    ts = ts.astimezone(UTC)
+    if granularity == "month":
+        return datetime(ts.year, ts.month, 1, tzinfo=UTC)
+    return datetime(ts.year, ts.month, ts.day, tzinfo=UTC)
+
+
+def _shift(granularity: str, start: datetime, n: int) -> datetime:
+    if granularity == "month":
+        months = start.year * 12 + start.month - 1 + n
+        return datetime(months // 12, months % 12 + 1, 1, tzinfo=UTC)
+    return start + timedelta(days=n)
+
+
+def partition_name(granularity: str, start: datetime) -> str:
+    return f"{PARENT}_p{start:%Y%m}" if granularity == "month" else f"{PARENT}_p{start:%Y%m%d}"
+
+
+def _parse_range(name: str) -> tuple[datetime, datetime] | None:
+    m = _NAME.match(name)
+    if not m:
+        return None  # default partition or something we don't manage
+    digits = m.group(1)
+    if len(digits) == 6:
+        lo = datetime(int(digits[:4]), int(digits[4:]), 1, tzinfo=UTC)
+        return lo, _shift("month", lo, 1)
+    lo = datetime(int(digits[:4]), int(digits[4:6]), int(digits[6:]), tzinfo=UTC)
+    return lo, _shift("day", lo, 1)
+
+
+def plan(policy: PartitionPolicy, now: datetime, existing: set[str]) -> dict[str, list]:
+    """
+    Pure planning step: which (name, lo, hi) ranges to create and which managed partitions
+    have aged out. Expiry is by upper bound, so a partition only goes once all of its rows
+    are older than the retention window.
+    """
+    g = policy.granularity
+    current = _period_start(g, now)
+    create = []
+    for n in range(-policy.lookback, policy.premake + 1):
+        lo = _shift(g, current, n)
+        name = partition_name(g, lo)
+        if name not in existing:
+            create.append((name, lo, _shift(g, lo, 1)))
+
+    expire = []
+    if policy.retention is not None:
+        cutoff = _shift(g, current, -policy.retention)
+        for name in sorted(existing):
+            bounds = _parse_range(name)  # from the name, so a granularity switch still expires old ones
+            if bounds is not None and bounds[1] <= cutoff:
+                expire.append(name)
+    return {"create": create, "expire": expire, "cutoff": cutoff if policy.retention is not None else None}
+
+
+def _existing_partitions(conn) -> set[str]:
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ),
+        {"parent": PARENT},
+    )
+    return {r[0] for r in rows}
+
+
+def maintain(engine: Engine, policy: PartitionPolicy, now: datetime | None = None, dry_run: bool = False) -> dict:
+    """
+    Create upcoming partitions and expire old ones. A no-op report on anything but
+    Postgres (SQLite tests have a plain, unpartitioned table).
+    """
+    now = now or datetime.now(UTC)
+    if engine.dialect.name != "postgresql":
+        return {"dialect": engine.dialect.name, "skipped": True, "created": [], "expired": []}
+
+    with engine.begin() as conn:
+        steps = plan(policy, now, _existing_partitions(conn))
+        if not dry_run:
+            for name, lo, hi in steps["create"]:
+                conn.execute(
+                    text(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT} '
+                        f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+                    )
+                )
+            for name in steps["expire"]:
+                conn.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION "{name}"'))
+                if policy.expire == "drop":
+                    conn.execute(text(f'DROP TABLE "{name}"'))
+            if steps["expire"]:
+                # expired events may be ingested again; their dedupe claims go with them
+                conn.execute(
+                    text("DELETE FROM interaction_dedupe WHERE emitted_at_utc < :cutoff"), {"cutoff": steps["cutoff"]}
+                )
+    report = {
+        "dialect": "postgresql",
+        "skipped": False,
+        "dry_run": dry_run,
+        "created": [name for name, _, _ in steps["create"]],
+        "expired": steps["expire"],
+        "expire_action": policy.expire,
+    }
+    log.info("interaction_log partitions: %s", report)
+    return report
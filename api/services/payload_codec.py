@@ -0,0 +1,111 @@
+# api/services/payload_codec.py
+from __future__ import annotations
+
+import os
+import zlib
+from functools import lru_cache
+
+# Optional zstd (pip install zstandard); zlib from the stdlib is the fallback
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+RAW = "raw"
+ZLIB = "zlib"
+ZSTD = "zstd"  # "zstd:<dict_id>" when written with a trained dictionary
+
+
+class CodecError(ValueError):
+    """Unknown codec id, or a zstd payload whose dictionary isn't loaded."""
+
+
+class PayloadCodec:
+    """
+    Compresses interaction payloads on write and restores them on read.
+
+    The codec id is stored per row (interaction_log.payload_codec), so the default can
+    change, or a new zstd dictionary can be trained, without rewriting old rows. Payloads
+    under `min_bytes`, or that don't shrink, are stored as-is under "raw".
+    """
+
+    def __init__(
+        self,
+        codec: str | None = None,
+        level: int | None = None,
+        min_bytes: int = 128,
+        zstd_dict: bytes | None = None,
+    ):
+        if codec is None:
+            codec = ZSTD if zstandard is not None else ZLIB
+        if codec not in (RAW, ZLIB, ZSTD):
+            raise CodecError(f"unknown payload codec {codec!r}")
+        if codec == ZSTD and zstandard is None:
+            raise CodecError("payload codec 'zstd' needs the zstandard package")
+        self.codec = codec
+        self.level = level
+        self.min_bytes = min_bytes
+        self._dict = zstandard.ZstdCompressionDict(zstd_dict) if zstd_dict and zstandard else None
+        self._zc = None
+        if codec == ZSTD:
+            self._zc = zstandard.ZstdCompressor(level=level or 3, dict_data=self._dict)
+
+    @property
+    def write_id(self) -> str:
+        if self.codec == ZSTD and self._dict is not None:
+            return f"{ZSTD}:{self._dict.dict_id()}"
+        return self.codec
+
+    def encode(self, data: bytes) -> tuple[str, bytes]:
+        """(codec_id, stored_bytes) for a raw payload."""
+        if self.codec == RAW or len(data) < self.min_bytes:
+            return RAW, data
+        if self.codec == ZSTD:
+            blob = self._zc.compress(data)
+        else:
+            blob = zlib.compress(data, self.level or 6)
+        if len(blob) >= len(data):
+            return RAW, data
+        return self.write_id, blob
+
+    def decode(self, codec_id: str | None, blob: bytes) -> bytes:
+        """Inverse of encode(), for any codec id this process can read."""
+        if not codec_id or codec_id == RAW:
+            return blob
+        if codec_id == ZLIB:
+            return zlib.decompress(blob)
+        if codec_id.startswith(ZSTD):
+            if zstandard is None:
+                raise CodecError(f"payload stored as {codec_id!r} but zstandard is not installed")
+            d = None
+            if ":" in codec_id:
+                if self._dict is None or f"{ZSTD}:{self._dict.dict_id()}" != codec_id:
+                    raise CodecError(f"payload stored as {codec_id!r} but that zstd dictionary is not loaded")
+                d = self._dict
+            return zstandard.ZstdDecompressor(dict_data=d).decompress(blob)
+        raise CodecError(f"unknown payload codec {codec_id!r}")
+
+
+@lru_cache(maxsize=1)
+def payload_codec() -> PayloadCodec:
+    """
+    INTERACTION_PAYLOAD_CODEC (raw | zlib | zstd; default zstd when installed, else zlib),
+    INTERACTION_PAYLOAD_LEVEL, INTERACTION_PAYLOAD_MIN_BYTES, INTERACTION_ZSTD_DICT (path to a
+    dictionary trained with `zstd --train` on sample payloads).
+    """
+    dict_path = os.getenv("INTERACTION_ZSTD_DICT")
+    zstd_dict = None
+    if dict_path:
+        with open(dict_path, "rb") as f:
+            zstd_dict = f.read()
+    level = os.getenv("INTERACTION_PAYLOAD_LEVEL")
+    return PayloadCodec(
+        codec=os.getenv("INTERACTION_PAYLOAD_CODEC") or None,
+        level=int(level) if level else None,
+        min_bytes=int(os.getenv("INTERACTION_PAYLOAD_MIN_BYTES", "128")),
+        zstd_dict=zstd_dict,
+    )
+
+
+def decode_payload(codec_id: str | None, blob: bytes) -> bytes:
+    return payload_codec().decode(codec_id, blob)
@@ -1,14 +1,27 @@
 # api/services/retrieval_numpy.py
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import logging
+import mmap
 import os
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import lru_cache
 from pathlib import Path
+from time import monotonic, perf_counter_ns
 
 import numpy as np
 import yaml
 
+from api.services.embedding_cache import EmbeddingCache
+
+log = logging.getLogger(__name__)
+
 CFG_PATH = Path("clarity_clean_analysis/04_configs/augury.local.yaml")
 
 
@@ -23,9 +36,75 @@ def _cfg():
     return yaml.safe_load(CFG_PATH.read_text())
 
 
-@lru_cache(maxsize=1)
-def _index():
-    cfg = _cfg()
+def _mmap_mode(cfg) -> str | None:
+    """`index.mmap_mode` from the YAML; "r" by default so workers share the page cache."""
+    mode = (cfg.get("index") or {}).get("mmap_mode", "r")
+    if mode in (None, False) or str(mode).lower() in ("", "none", "off", "false"):
+        return None
+    return str(mode)
+
+
+def _offsets_path(p_corpus: Path) -> Path:
+    return p_corpus.with_name(p_corpus.name + ".offsets.npy")
+
+
+def _scan_line_offsets(buf) -> np.ndarray:
+    """(start, end) byte spans of every non-blank line, in file order (same rows as build_numpy_index)."""
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    nl = np.flatnonzero(raw == 0x0A)
+    starts = np.concatenate(([0], nl + 1)).astype(np.int64)
+    ends = np.concatenate((nl, [raw.size])).astype(np.int64)
+    # the builder skips lines where `not line.strip()`: count ASCII non-whitespace bytes per line
+    solid = np.concatenate(([0], np.cumsum((raw > 0x20) & (raw < 0x80), dtype=np.int64)))
+    high = np.concatenate(([0], np.cumsum(raw >= 0x80, dtype=np.int64)))
+    keep = solid[ends] > solid[starts]
+    # no ASCII text but non-ASCII bytes (e.g. only "\u00a0"): let str.strip() decide, as the builder does
+    for i in np.flatnonzero(~keep & (high[ends] > high[starts])):
+        keep[i] = bool(bytes(buf[starts[i] : ends[i]]).decode("utf-8", errors="replace").strip())
+    return np.stack((starts[keep], ends[keep]), axis=1)
+
+
+class CorpusText:
+    """
+    Row-addressed, lazily read view over the corpus JSONL.
+
+    The corpus file is memory-mapped and a sidecar `<corpus>.offsets.npy` holds one
+    (start, end) byte span per index row, so a hit costs one slice + one json.loads
+    instead of holding every chunk's text in a per-worker dict.
+    """
+
+    def __init__(self, p_corpus: Path, n_rows: int):
+        self._f = p_corpus.open("rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = self._load_offsets(p_corpus, n_rows)
+
+    def _load_offsets(self, p_corpus: Path, n_rows: int) -> np.ndarray:
+        p_off = _offsets_path(p_corpus)
+        try:
+            if p_off.stat().st_mtime_ns >= p_corpus.stat().st_mtime_ns:
+                offsets = np.load(p_off, mmap_mode="r")
+                if offsets.shape == (n_rows, 2):
+                    return offsets
+        except (OSError, ValueError):
+            pass
+        offsets = _scan_line_offsets(self._mm)
+        if offsets.shape[0] != n_rows:
+            raise ValueError(f"corpus has {offsets.shape[0]} lines, index has {n_rows} rows")
+        try:
+            np.save(p_off, offsets)
+        except OSError:
+            pass  # read-only deploy: rescan next start, still no dict
+        return offsets
+
+    def __len__(self) -> int:
+        return int(self._offsets.shape[0])
+
+    def __getitem__(self, row: int) -> str:
+        start, end = self._offsets[row]
+        return json.loads(self._mm[int(start) : int(end)])["content"]
+
+
+def _load_index(cfg):
     p_index = cfg["paths"].get("index", "")
     p_idmap = cfg["paths"].get("id_map", "")
     p_corpus = cfg["paths"].get("corpus", "")
@@ -35,20 +114,364 @@ def _index():
         X = np.zeros((n, d), dtype="float32")
         X[:, 0] = 1.0
         id_map = {i: f"dummy_{i:05d}" for i in range(n)}
-        cid2text = {v: "dummy text" for v in id_map.values()}
-        return X, id_map, cid2text
-    X = np.load(p_index)
+        texts = ["dummy text"] * n
+        return X, id_map, texts
+    # mmap: pages come from the shared page cache, nothing is copied per worker
+    X = np.load(p_index, mmap_mode=_mmap_mode(cfg))
     with Path(p_idmap).open("r", encoding="utf-8") as f:
         id_map = {int(k): v for k, v in json.load(f).items()}
-    cid2text = {}
     if p_corpus and Path(p_corpus).exists():
-        with Path(p_corpus).open("r", encoding="utf-8") as f:
-            for line in f:
-                j = json.loads(line)
-                cid2text[j["chunk_id"]] = j["content"]
+        texts = CorpusText(Path(p_corpus), X.shape[0])
     else:
-        cid2text = {v: "text unavailable in CI" for v in id_map.values()}
-    return X, id_map, cid2text
+        texts = ["text unavailable in CI"] * X.shape[0]
+    return X, id_map, texts
+
+
+def topk_stable(sims: np.ndarray, k: int) -> np.ndarray:
+    """
+    Row ids of the k best scores, ordered by (-score, id) like ann_diag.truth_numpy_stable.
+
+    argpartition selects in O(N); only the candidates scoring >= the k-th best (k plus any
+    ties at the boundary) are sorted, so the result equals a full stable sort's first k.
+    """
+    n = sims.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k == n:
+        return np.lexsort((np.arange(n), -sims))
+    kth = sims[np.argpartition(-sims, k - 1)[k - 1]]
+    cand = np.flatnonzero(sims >= kth)
+    order = np.lexsort((cand, -sims[cand]))
+    return cand[order[:k]]
+
+
+_STAGES: ContextVar[dict | None] = ContextVar("ask_stages", default=None)
+
+
+@contextmanager
+def _stage(name: str):
+    """Accumulate perf_counter_ns for `name` when a caller opted in (debug=2); no-op otherwise."""
+    rec = _STAGES.get()
+    if rec is None:
+        yield
+        return
+    t0 = perf_counter_ns()
+    try:
+        yield
+    finally:
+        rec[name] = rec.get(name, 0) + perf_counter_ns() - t0
+
+
+class NumpySearch:
+    """Exact cosine over the (normalized) index matrix; always available."""
+
+    name = "numpy"
+
+    def __init__(self, X: np.ndarray):
+        self.X = X
+
+    def search(self, q: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        with _stage("scan"):
+            sims = self.X @ q
+        with _stage("topk"):
+            idxs = topk_stable(sims, k)
+        return idxs, sims[idxs]
+
+    def search_batch(self, Q: np.ndarray, k: int) -> list[tuple[np.ndarray, np.ndarray]]:
+        S = self.X @ Q.T  # one GEMM, (N, m)
+        out = []
+        for j in range(S.shape[1]):
+            sims = S[:, j]
+            idxs = topk_stable(sims, k)
+            out.append((idxs, sims[idxs]))
+        return out
+
+
+class FaissSearch:
+    """Persisted FAISS index (Flat / IVF) written by scripts/ann_dry_run.py."""
+
+    def __init__(self, name: str, path: str, X: np.ndarray, params: dict):
+        import faiss  # optional dependency
+
+        self.name = name
+        self.X = X
+        self._idx = faiss.read_index(path)
+        if self._idx.ntotal != X.shape[0]:
+            raise ValueError(f"{path} holds {self._idx.ntotal} vectors, index.npy has {X.shape[0]}")
+        if name == "faiss_ivf" and "nprobe" in params:
+            faiss.extract_index_ivf(self._idx).nprobe = int(params["nprobe"])
+
+    def search(self, q: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        return self.search_batch(q[None, :], k)[0]
+
+    def search_batch(self, Q: np.ndarray, k: int) -> list[tuple[np.ndarray, np.ndarray]]:
+        _, nn = self._idx.search(np.ascontiguousarray(Q), k)
+        out = []
+        for q, row in zip(Q, nn, strict=True):
+            idxs = row[row >= 0]
+            # re-score exactly so scores match the numpy backend
+            out.append((idxs, self.X[idxs] @ q))
+        return out
+
+
+class HnswSearch:
+    """Persisted hnswlib index written by scripts/ann_dry_run.py --algo hnsw."""
+
+    name = "hnsw"
+
+    def __init__(self, path: str, X: np.ndarray, params: dict):
+        import hnswlib  # optional dependency
+
+        self.X = X
+        self._idx = hnswlib.Index(space="ip", dim=int(X.shape[1]))
+        self._idx.load_index(path, max_elements=int(X.shape[0]))
+        if self._idx.get_current_count() != X.shape[0]:
+            raise ValueError(f"{path} holds {self._idx.get_current_count()} vectors, index.npy has {X.shape[0]}")
+        self._idx.set_ef(int(params.get("ef_search", 200)))
+
+    def search(self, q: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        return self.search_batch(q[None, :], k)[0]
+
+    def search_batch(self, Q: np.ndarray, k: int) -> list[tuple[np.ndarray, np.ndarray]]:
+        labels, _ = self._idx.knn_query(Q, k=k)
+        out = []
+        for q, row in zip(Q, labels, strict=True):
+            idxs = row.astype(np.int64)
+            out.append((idxs, self.X[idxs] @ q))
+        return out
+
+
+QUANT_FORMATS = ("int8", "float16")
+
+
+def quant_paths(p_index: str | Path, fmt: str) -> tuple[Path, Path | None]:
+    """Sidecars next to index.npy: index.int8.npy (+ index.int8.scales.npy) or index.float16.npy."""
+    p = Path(p_index)
+    stem = p.name[: -len(".npy")] if p.name.endswith(".npy") else p.name
+    data = p.with_name(f"{stem}.{fmt}.npy")
+    return data, (p.with_name(f"{stem}.{fmt}.scales.npy") if fmt == "int8" else None)
+
+
+def quant_meta_path(p_index: str | Path, fmt: str) -> Path:
+    """index.<fmt>.meta.json: which index.npy the sidecars were quantized from (written last)."""
+    p_data, _ = quant_paths(p_index, fmt)
+    return p_data.with_name(p_data.name[: -len(".npy")] + ".meta.json")
+
+
+def index_signature(p_index: str | Path) -> dict:
+    """(size, mtime_ns) of index.npy; build_numpy_index rewrites it, so any rebuild changes this."""
+    st = Path(p_index).stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def quantize_rows(X: np.ndarray, fmt: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """int8 with a per-row float32 scale (x ≈ q * scale), or plain float16."""
+    if fmt == "float16":
+        return X.astype(np.float16), None
+    if fmt != "int8":
+        raise ValueError(f"unknown quantized format: {fmt}")
+    scales = (np.abs(X).max(axis=1) / 127.0).astype(np.float32)
+    scales[scales == 0] = 1.0
+    Xq = np.clip(np.rint(X / scales[:, None]), -127, 127).astype(np.int8)
+    return Xq, scales
+
+
+class QuantizedSearch:
+    """
+    Two-pass exact-ish search: scan the compact int8/float16 matrix (2-4x fewer bytes than
+    float32), keep the best `rerank` rows, re-score those in float32 from index.npy.
+    int8 is also the faster scan; NumPy upcasts float16 in software, so float16 only saves
+    memory and costs latency (binder_receipts/ann_quant.json).
+    """
+
+    def __init__(self, X: np.ndarray, Xq: np.ndarray, scales: np.ndarray | None, rerank: int = 64, block: int = 256):
+        if Xq.shape != X.shape or (scales is not None and scales.shape != (X.shape[0],)):
+            raise ValueError(f"quantized index shape {Xq.shape} does not match index.npy {X.shape}")
+        self.name = f"numpy_{Xq.dtype}"
+        self.X = X
+        self.Xq = Xq
+        self.scales = scales
+        self.rerank = rerank
+        self.block = block
+
+    def _approx(self, Q: np.ndarray) -> np.ndarray:
+        # `block` rows at a time are upcast into one reused float32 buffer (1 MiB at 256 x 1024),
+        # so the scan streams 1-2 bytes per weight and never allocates a float32 copy of the matrix
+        n = self.Xq.shape[0]
+        out = np.empty((n, Q.shape[0]), dtype=np.float32)
+        buf = np.empty((min(self.block, n), self.Xq.shape[1]), dtype=np.float32)
+        QT = np.ascontiguousarray(Q.T, dtype=np.float32)
+        for i in range(0, n, self.block):
+            j = min(i + self.block, n)
+            np.copyto(buf[: j - i], self.Xq[i:j], casting="unsafe")
+            np.matmul(buf[: j - i], QT, out=out[i:j])
+            if self.scales is not None:
+                out[i:j] *= self.scales[i:j, None]
+        return out
+
+    def search(self, q: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        return self.search_batch(q[None, :], k)[0]
+
+    def search_batch(self, Q: np.ndarray, k: int) -> list[tuple[np.ndarray, np.ndarray]]:
+        with _stage("scan"):
+            A = self._approx(Q)
+        out = []
+        for j in range(A.shape[1]):
+            with _stage("topk"):
+                # ascending row ids: sequential reads of the mmap and an id-ordered tie-break below
+                cand = np.sort(topk_stable(A[:, j], max(k, self.rerank)))
+            with _stage("rerank"):
+                exact = self.X[cand] @ Q[j]
+                best = topk_stable(exact, k)
+            out.append((cand[best], exact[best]))
+        return out
+
+
+def _load_quantized(cfg, X: np.ndarray):
+    icfg = cfg.get("index") or {}
+    fmt = str(icfg.get("quantized") or "").lower()
+    p_index = (cfg.get("paths") or {}).get("index", "")
+    if fmt not in QUANT_FORMATS or not p_index:
+        return None
+    p_data, p_scales = quant_paths(p_index, fmt)
+    if not p_data.exists() or (p_scales is not None and not p_scales.exists()):
+        return None
+    try:
+        source = json.loads(quant_meta_path(p_index, fmt).read_text(encoding="utf-8")).get("source")
+    except (OSError, ValueError):
+        source = None
+    if source != index_signature(p_index):
+        # stale sidecars would silently pick the rerank candidates from an older index
+        log.warning("%s sidecars do not match %s (re-run scripts/quantize_index.py); exact search", fmt, p_index)
+        return None
+    if fmt == "float16":
+        log.warning("index.quantized=float16 halves memory but scans slower than float32; int8 is the fast path")
+    mode = _mmap_mode(cfg)
+    Xq = np.load(p_data, mmap_mode=mode)
+    scales = np.load(p_scales, mmap_mode=mode) if p_scales is not None else None
+    return QuantizedSearch(X, Xq, scales, rerank=int(icfg.get("rerank", 64)))
+
+
+def _load_searcher(cfg, X: np.ndarray):
+    icfg = cfg.get("index") or {}
+    backend = str(icfg.get("backend", "numpy")).lower()
+    path = icfg.get("path", "")
+    if backend == "numpy" or not path or not Path(path).exists():
+        # index.quantized: int8 | float16 → compact first pass + float32 rerank
+        return _load_quantized(cfg, X) or NumpySearch(X)
+    params = {}
+    meta = Path(path + ".meta.json")
+    if meta.exists():
+        params.update(json.loads(meta.read_text(encoding="utf-8")))
+    params.update({k: v for k, v in icfg.items() if k in ("nprobe", "ef_search")})
+    if backend in ("faiss", "faiss_flat", "faiss_ivf"):
+        return FaissSearch(backend, path, X, params)
+    if backend == "hnsw":
+        return HnswSearch(path, X, params)
+    raise ValueError(f"unknown index.backend: {backend}")
+
+
+def _manifest_path(cfg) -> Path | None:
+    p_manifest = cfg["paths"].get("manifest", "")
+    if p_manifest:
+        return Path(p_manifest)
+    p_index = cfg["paths"].get("index", "")
+    return Path(p_index).with_name("index_manifest.json") if p_index else None
+
+
+def _manifest_sha(cfg) -> str:
+    """Generation id: sha256 of index_manifest.json (rewritten last by build_numpy_index)."""
+    p = _manifest_path(cfg)
+    try:
+        return hashlib.sha256(p.read_bytes()).hexdigest()[:16]
+    except (OSError, AttributeError):
+        return "static"
+
+
+class Generation:
+    """One loaded corpus/index; swapped as a whole so a request never mixes two of them."""
+
+    def __init__(self, gen_id: str, cfg):
+        self.gen_id = gen_id
+        self.X, self.id_map, self.texts = _load_index(cfg)
+        self.configured = str((cfg.get("index") or {}).get("backend", "numpy")).lower()
+        try:
+            # index.backend (numpy | faiss | faiss_ivf | hnsw) + index.path; exact NumPy if unloadable
+            self.searcher = _load_searcher(cfg, self.X)
+        except Exception:
+            log.warning("index.backend %r failed to load; serving exact numpy search", self.configured, exc_info=True)
+            self.searcher = NumpySearch(self.X)
+        log.info("index generation %s: backend %s (configured %s)", gen_id, self.searcher.name, self.configured)
+
+
+_GEN: Generation | None = None
+_GEN_LOCK = threading.Lock()
+_WATCH = {"checked": 0.0, "stat": None, "reloading": False}
+
+
+def _generation() -> Generation:
+    gen = _GEN
+    if gen is None:
+        with _GEN_LOCK:
+            if _GEN is None:
+                _swap(Generation(_manifest_sha(_cfg()), _cfg()))
+            return _GEN
+    _maybe_reload(gen)
+    return gen
+
+
+def _swap(new: Generation) -> None:
+    global _GEN
+    _GEN = new
+    # only results computed against an older generation are stale
+    _RESULTS.drop_where(lambda key: key[0] != new.gen_id)
+
+
+def _maybe_reload(gen: Generation) -> None:
+    """Cheap stat() of the manifest every `index.reload_check_s`; reload off-thread on change."""
+    cfg = _cfg()
+    interval = float((cfg.get("index") or {}).get("reload_check_s", 2.0))
+    now = monotonic()
+    if interval <= 0 or now - _WATCH["checked"] < interval:
+        return
+    _WATCH["checked"] = now
+    p = _manifest_path(cfg)
+    try:
+        st = p.stat()
+        sig = (st.st_size, st.st_mtime_ns, st.st_ino)
+    except (OSError, AttributeError):
+        sig = None
+    if sig == _WATCH["stat"] or _WATCH["reloading"]:
+        return
+    _WATCH["stat"] = sig
+    _WATCH["reloading"] = True
+    # the old generation keeps serving while the new one loads
+    threading.Thread(target=reload_index, daemon=True).start()
+
+
+def reload_index() -> bool:
+    """Load + atomically swap in a new generation if the manifest sha256 changed."""
+    try:
+        cfg = _cfg()
+        sha = _manifest_sha(cfg)
+        if _GEN is not None and _GEN.gen_id == sha:
+            return False
+        new = Generation(sha, cfg)
+        with _GEN_LOCK:
+            _swap(new)
+        return True
+    finally:
+        _WATCH["reloading"] = False
+
+
+def _index():
+    gen = _generation()
+    return gen.X, gen.id_map, gen.texts
+
+
+def _searcher():
+    return _generation().searcher
 
 
 @lru_cache(maxsize=1)
@@ -62,10 +485,12 @@ def _embedder():
     if backend == "dummy":
 
         class Dummy:
+            cache_key = "dummy"  # never share cached vectors with the real model
+
             def encode(self, arr):
                 dim = int(_cfg()["embeddings"]["dim"])
-                v = np.zeros((1, dim), dtype="float32")
-                v[0, 0] = 1.0  # simple unit vector for stable sims
+                v = np.zeros((len(arr), dim), dtype="float32")
+                v[:, 0] = 1.0  # simple unit vector for stable sims
                 return v
 
         return Dummy()
@@ -76,25 +501,202 @@ def _embedder():
     except Exception:
         # Auto-fallback in CI where the lib isn't installed
         class Dummy:
+            cache_key = "dummy"  # never share cached vectors with the real model
+
             def encode(self, arr):
                 dim = int(_cfg()["embeddings"]["dim"])
-                v = np.zeros((1, dim), dtype="float32")
-                v[0, 0] = 1.0
+                v = np.zeros((len(arr), dim), dtype="float32")
+                v[:, 0] = 1.0
                 return v
 
         return Dummy()
 
 
-@lru_cache(maxsize=512)
-def _ask_cached(q_norm: str, k: int):
-    X, id_map, cid2text = _index()
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class ResultCache:
+    """Thread-safe LRU for (generation, q_norm, k) → hits; cache_info() mirrors functools.lru_cache."""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return self._data[key]
+            self._misses += 1
+            return None
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def drop_where(self, pred) -> int:
+        with self._lock:
+            stale = [key for key in self._data if pred(key)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._data))
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = 0
+
+
+_RESULTS = ResultCache(maxsize=512)
+
+
+@lru_cache(maxsize=1)
+def _emb_cache() -> EmbeddingCache | None:
+    """
+    Persistent query-embedding cache: `embeddings.cache_path` (default next to index.npy),
+    bounded by `embeddings.cache_max_entries`. Off when there is no real index (CI).
+    """
+    cfg = _cfg()
+    ecfg = cfg.get("embeddings") or {}
+    p_index = cfg["paths"].get("index", "")
+    path = ecfg.get("cache_path", str(Path(p_index).with_name("query_embeddings.sqlite")) if p_index else None)
+    if not path:
+        return None
+    try:
+        return EmbeddingCache(path, int(ecfg.get("cache_max_entries", 100_000)))
+    except Exception:
+        return None
+
+
+def _encode(qs: list[str]) -> np.ndarray:
+    """Embed + L2-normalize queries as a (len(qs), dim) float32 matrix, via the embedding cache."""
     emb = _embedder()
-    q = emb.encode([q_norm])[0].astype("float32")
-    q /= np.linalg.norm(q) + 1e-12
-    sims = X @ q
-    idxs = np.argsort(-sims)[:k].tolist()
+    model = getattr(emb, "cache_key", None) or _cfg()["embeddings"]["model"]
+    cache = _emb_cache()
+    found = cache.get_many(model, qs) if cache is not None else {}
+    todo = [q for q in dict.fromkeys(qs) if q not in found]
+    if todo:
+        V = np.asarray(emb.encode(todo), dtype="float32").reshape(len(todo), -1)
+        V /= np.linalg.norm(V, axis=1, keepdims=True) + 1e-12
+        fresh = dict(zip(todo, V, strict=True))
+        if cache is not None:
+            cache.put_many(model, fresh)
+        found.update(fresh)
+    return np.stack([found[q] for q in qs])
+
+
+def _to_hits(gen: Generation, idxs: np.ndarray, scores: np.ndarray):
     # tuples are fine to cache
-    return tuple((id_map[i], float(sims[i]), cid2text[id_map[i]]) for i in idxs)
+    return tuple((gen.id_map[i], float(s), gen.texts[i]) for i, s in zip(idxs.tolist(), scores.tolist(), strict=True))
+
+
+def _ask_cached(q_norm: str, k: int):
+    gen = _generation()
+    key = (gen.gen_id, q_norm, k)
+    with _stage("cache_lookup"):
+        res = _RESULTS.get(key)
+    if res is None:
+        with _stage("encode"):
+            q = _encode([q_norm])[0]
+        idxs, scores = gen.searcher.search(q, k)
+        with _stage("hits"):
+            res = _to_hits(gen, idxs, scores)
+        _RESULTS.put(key, res)
+    return res
+
+
+def _search_uncached(q_norms: list[str], k: int) -> dict:
+    """Embed + search queries known to be cache misses; fills the result cache."""
+    gen = _generation()
+    fresh = {}
+    for qn, (idxs, scores) in zip(q_norms, gen.searcher.search_batch(_encode(q_norms), k), strict=True):
+        fresh[qn] = _to_hits(gen, idxs, scores)
+        _RESULTS.put((gen.gen_id, qn, k), fresh[qn])
+    return fresh
+
+
+def _ask_cached_batch(q_norms: list[str], k: int):
+    """Per-query cache lookup; the misses share one encode call and one X @ Q.T pass."""
+    gen_id = _generation().gen_id
+    out = [_RESULTS.get((gen_id, qn, k)) for qn in q_norms]
+    todo = list(dict.fromkeys(qn for qn, res in zip(q_norms, out, strict=True) if res is None))
+    if not todo:
+        return out
+    fresh = _search_uncached(todo, k)
+    return [res if res is not None else fresh[qn] for qn, res in zip(q_norms, out, strict=True)]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent /ask misses arriving within `window_ms` (or `max_batch` of them)
+    into one encode + one similarity pass, then fans the hits back to each awaiting request.
+    """
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: list[tuple[str, int, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def ask(self, q_norm: str, k: int):
+        res = _RESULTS.get((_generation().gen_id, q_norm, k))
+        if res is not None:
+            return res
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((q_norm, k, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch) -> None:
+        by_k: dict[int, list[tuple[str, asyncio.Future]]] = {}
+        for qn, k, fut in batch:
+            by_k.setdefault(k, []).append((qn, fut))
+        for k, items in by_k.items():
+            try:
+                found = await asyncio.to_thread(_search_uncached, list(dict.fromkeys(qn for qn, _ in items)), k)
+            except Exception as e:
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for qn, fut in items:
+                if not fut.done():
+                    fut.set_result(found[qn])
+
+
+@lru_cache(maxsize=1)
+def _batcher() -> MicroBatcher | None:
+    """Env-gated: ASK_BATCH_WINDOW_MS > 0 turns micro-batching on (ASK_BATCH_MAX caps a batch)."""
+    window_ms = float(os.getenv("ASK_BATCH_WINDOW_MS", "0") or 0)
+    if window_ms <= 0:
+        return None
+    return MicroBatcher(window_ms, int(os.getenv("ASK_BATCH_MAX", "32")))
 
 
 def _normalize_q(s: str) -> str:
@@ -102,16 +704,39 @@ def _normalize_q(s: str) -> str:
 
 
 def ask_numpy(query: str, k: int = 5):
-    qn = _normalize_q(query)
+    with _stage("normalize"):
+        qn = _normalize_q(query)
     res = _ask_cached(qn, k)
+    with _stage("format"):
+        return [{"chunk_id": cid, "score": score, "text": text} for (cid, score, text) in res]
+
+
+def ask_numpy_batch(queries: list[str], k: int = 5):
+    """Several queries at once: one embedder call + one GEMM for the uncached ones."""
+    res = _ask_cached_batch([_normalize_q(q) for q in queries], k)
+    return [[{"chunk_id": cid, "score": score, "text": text} for (cid, score, text) in hits] for hits in res]
+
+
+async def ask_numpy_async(query: str, k: int = 5):
+    """ask_numpy for async routes: micro-batched when enabled, else off the event loop."""
+    batcher = _batcher()
+    if batcher is None:
+        return await asyncio.to_thread(ask_numpy, query, k)
+    res = await batcher.ask(_normalize_q(query), k)
     return [{"chunk_id": cid, "score": score, "text": text} for (cid, score, text) in res]
 
 
-def ask_numpy_with_stats(query: str, k: int = 5):
-    """Run ask with cache stats before/after to reveal hit/miss deltas."""
-    before = _ask_cached.cache_info()
-    res = ask_numpy(query, k)  # uses the cached path
-    after = _ask_cached.cache_info()
+def ask_numpy_with_stats(query: str, k: int = 5, stages: bool = False):
+    """Run ask with cache stats before/after to reveal hit/miss deltas (+ per-stage ns if asked)."""
+    token = _STAGES.set({}) if stages else None
+    before = _RESULTS.cache_info()
+    try:
+        res = ask_numpy(query, k)  # uses the cached path
+    finally:
+        rec = _STAGES.get()
+        if token is not None:
+            _STAGES.reset(token)
+    after = _RESULTS.cache_info()
     stats = {
         "hits_total": after.hits,
         "misses_total": after.misses,
@@ -119,12 +744,34 @@ def ask_numpy_with_stats(query: str, k: int = 5):
         "miss_delta": after.misses - before.misses,
         "cache_size": after.currsize,
     }
+    if _emb_cache() is not None:
+        stats["embedding_cache"] = _emb_cache().stats()
+    if token is not None:
+        stats["stages_ns"] = rec
     return res, stats
 
 
+def retrieval_stats() -> dict:
+    """Counters for /metrics; reports on what is loaded without loading anything."""
+    info = _RESULTS.cache_info()
+    gen = _GEN
+    stats = {
+        "result_cache_hits": info.hits,
+        "result_cache_misses": info.misses,
+        "result_cache_size": info.currsize,
+        "index_rows": int(gen.X.shape[0]) if gen is not None else 0,
+        "index_backend": gen.searcher.name if gen is not None else "unloaded",
+        "index_backend_configured": gen.configured if gen is not None else "",
+        "index_generation": gen.gen_id if gen is not None else "",
+    }
+    if _emb_cache.cache_info().currsize and _emb_cache() is not None:
+        stats["embedding_cache"] = _emb_cache().stats()
+    return stats
+
+
 def prewarm():
     """Warm embedder + index so first request isn't cold."""
     emb = _embedder()
     _ = emb.encode(["warmup"])[0]  # load model
-    X, _, _ = _index()
+    X, _, _ = _index()  # also loads the ANN index if configured
     _ = float(X[0] @ X[0])  # touch BLAS/matrix
@@ -0,0 +1,110 @@
+# api/services/telemetry.py
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict, deque
+from datetime import UTC, datetime
+
+
+class RecentSet:
+    """Fixed-size LRU of recently seen keys: approximate distinct for `cache_hit`, O(1) memory bound."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._keys: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check_and_add(self, key: str) -> bool:
+        """True if `key` was already present; records it either way."""
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return True
+            self._keys[key] = None
+            if len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+            return False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class TelemetrySink:
+    """
+    Bounded ring buffer of telemetry records + background flusher.
+
+    The request path only does a deque append (atomic in CPython); serialization and the
+    blocking write happen on the flusher thread, batched every `flush_ms`. When the ring is
+    full the oldest records are dropped and counted rather than blocking requests.
+    """
+
+    def __init__(self, path: str | None = None, capacity: int = 8192, flush_ms: int = 1000):
+        self.path = path
+        self.capacity = capacity
+        self.flush_s = flush_ms / 1000.0
+        self.dropped = 0
+        self._ring: deque[dict] = deque(maxlen=capacity)
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def emit(self, record: dict) -> None:
+        if len(self._ring) == self.capacity:
+            self.dropped += 1
+        self._ring.append(record)
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._write_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="telemetry-flusher", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_s)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass  # telemetry must never take the worker down
+
+    def flush(self) -> int:
+        """Drain the ring and write one batch; returns the number of lines written."""
+        lines = []
+        while True:
+            try:
+                rec = self._ring.popleft()
+            except IndexError:
+                break
+            ts = rec.get("ts")
+            if isinstance(ts, float):
+                rec["ts"] = datetime.fromtimestamp(ts, UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            lines.append(json.dumps(rec))
+        if not lines:
+            return 0
+        blob = "\n".join(lines) + "\n"
+        with self._write_lock:
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(blob)
+            else:
+                sys.stdout.write(blob)
+                sys.stdout.flush()
+        return len(lines)
+
+
+def sink_from_env() -> TelemetrySink:
+    """LOG_TELEMETRY_PATH (default stdout), LOG_TELEMETRY_BUFFER, LOG_TELEMETRY_FLUSH_MS."""
+    return TelemetrySink(
+        path=os.getenv("LOG_TELEMETRY_PATH") or None,
+        capacity=int(os.getenv("LOG_TELEMETRY_BUFFER", "8192")),
+        flush_ms=int(os.getenv("LOG_TELEMETRY_FLUSH_MS", "1000")),
+    )
@@ -0,0 +1,201 @@
+# api/services/write_behind.py
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+from collections.abc import Callable
+from functools import lru_cache
+from pathlib import Path
+from time import monotonic, sleep
+
+from sqlalchemy.orm import Session
+
+from api.schemas.interaction import InteractionCreate
+from api.services.interaction import create_interactions_bulk, encode_payload
+
+log = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the write-behind queue is at capacity (→ 429)."""
+
+
+class WriteBehindLog:
+    """
+    Bounded in-process queue in front of InteractionLog with group commit.
+
+    Requests are validated and hashed on the request path, then enqueued; a single flusher
+    thread drains up to `batch_size` items or whatever arrived within `flush_ms`, and writes
+    them through create_interactions_bulk (one lookup, one multi-row INSERT, one commit).
+    A full queue rejects instead of blocking, so callers can shed load with 429.
+
+    Queued items were already answered 202, so a failed commit is never just dropped: the
+    batch is retried `retries` times with exponential backoff from `backoff_ms`, then split
+    and written one item at a time, and only the items that still fail are dead-lettered
+    (appended as JSON lines to `dead_letter`, or logged in full when no path is set).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_ms: int = 50,
+        retries: int = 3,
+        backoff_ms: int = 100,
+        dead_letter: str | Path | None = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_s = flush_ms / 1000.0
+        self.retries = retries
+        self.backoff_s = backoff_ms / 1000.0
+        self.dead_letter = Path(dead_letter) if dead_letter else None
+        self.stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "written": 0,
+            "duplicates": 0,
+            "batches": 0,
+            "retries": 0,
+            "failed": 0,
+        }
+        self._q: queue.Queue[InteractionCreate] = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, interaction: InteractionCreate) -> str:
+        """Enqueue one interaction; returns its payload_hash or raises QueueFull."""
+        payload_hash = hashlib.sha256(encode_payload(interaction.payload)).hexdigest()
+        if self._stop.is_set():
+            raise QueueFull("write-behind log is shutting down")
+        try:
+            self._q.put_nowait(interaction)
+        except queue.Full:
+            self.stats["rejected"] += 1
+            raise QueueFull(f"write-behind queue full ({self._q.maxsize})") from None
+        self.stats["accepted"] += 1
+        if self._thread is None:
+            self._start()
+        return payload_hash
+
+    def depth(self) -> int:
+        return self._q.qsize()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="interaction-write-behind", daemon=True)
+            self._thread.start()
+
+    def _take_batch(self) -> list[InteractionCreate]:
+        try:
+            batch = [self._q.get(timeout=self.flush_s)]
+        except queue.Empty:
+            return []
+        deadline = monotonic() + self.flush_s
+        while len(batch) < self.batch_size:
+            remaining = deadline - monotonic()
+            try:
+                batch.append(self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, batch: list[InteractionCreate]) -> bool:
+        db = self.session_factory()
+        try:
+            results = create_interactions_bulk(db, batch)
+        except Exception:
+            db.rollback()
+            log.warning("write-behind flush of %d interactions failed", len(batch), exc_info=True)
+            return False
+        finally:
+            db.close()
+        created = sum(1 for _, c in results if c)
+        self.stats["written"] += created
+        self.stats["duplicates"] += len(results) - created
+        self.stats["batches"] += 1
+        return True
+
+    def _write(self, batch: list[InteractionCreate]) -> None:
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                sleep(min(self.backoff_s * 2 ** (attempt - 1), 5.0))
+            if self._commit(batch):
+                return
+        if len(batch) == 1:
+            self._dead_letter(batch[0])
+            return
+        # Still failing: one bad item sinks every batch it's in, so write the rest around it
+        for item in batch:
+            if not self._commit([item]):
+                self._dead_letter(item)
+
+    def _dead_letter(self, item: InteractionCreate) -> None:
+        self.stats["failed"] += 1
+        line = item.model_dump_json()
+        if self.dead_letter is not None:
+            try:
+                with self.dead_letter.open("a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                log.error("write-behind gave up on an interaction; dead-lettered to %s", self.dead_letter)
+                return
+            except OSError:
+                log.exception("write-behind dead-letter file %s is not writable", self.dead_letter)
+        log.error("write-behind gave up on an interaction: %s", line)
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._q.empty()):
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+
+    def flush(self) -> None:
+        """Synchronously write everything queued so far (tests, shutdown without a thread)."""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop accepting, let the flusher drain the queue, then return."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()  # anything left if the flusher never started or timed out
+
+
+@lru_cache(maxsize=1)
+def write_behind() -> WriteBehindLog | None:
+    """
+    INTERACTION_WRITE_BEHIND=1 enables it; INTERACTION_WB_QUEUE, INTERACTION_WB_BATCH,
+    INTERACTION_WB_FLUSH_MS, INTERACTION_WB_RETRIES and INTERACTION_WB_BACKOFF_MS tune it, and
+    INTERACTION_WB_DEAD_LETTER names a JSONL file for items that never commit. None when
+    disabled (synchronous per-request commit).
+    """
+    if str(os.getenv("INTERACTION_WRITE_BEHIND", "")).lower() not in ("1", "true", "yes", "on"):
+        return None
+    from api.database import SessionLocal
+
+    return WriteBehindLog(
+        SessionLocal,
+        max_queue=int(os.getenv("INTERACTION_WB_QUEUE", "10000")),
+        batch_size=int(os.getenv("INTERACTION_WB_BATCH", "500")),
+        flush_ms=int(os.getenv("INTERACTION_WB_FLUSH_MS", "50")),
+        retries=int(os.getenv("INTERACTION_WB_RETRIES", "3")),
+        backoff_ms=int(os.getenv("INTERACTION_WB_BACKOFF_MS", "100")),
+        dead_letter=os.getenv("INTERACTION_WB_DEAD_LETTER") or None,
+    )
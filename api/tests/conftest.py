@@ -6,6 +6,7 @@ from sqlalchemy.orm import sessionmaker
 from api.dependencies import get_db
 from api.main import app
 from api.models import Base
+from api.schemas.interaction import InteractionCreate
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
@@ -16,12 +17,31 @@ Base.metadata.create_all(bind=engine)
 
 
 @pytest.fixture()
-def client() -> TestClient:
-    # This fixture now controls the transaction for a single test function
+def connection():
+    # One connection and outer transaction per test; the rollback undoes everything its sessions commit
     connection = engine.connect()
     transaction = connection.begin()
-    db = TestingSessionLocal(bind=connection)
+    yield connection
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture()
+def session_factory(connection):
+    """Fresh sessions on the test's connection, for code that opens its own (write-behind, Merkle sync)."""
+    return lambda: TestingSessionLocal(bind=connection)
+
+
+@pytest.fixture()
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
 
+
+@pytest.fixture()
+def client(db) -> TestClient:
+    # Routes get the test's session, so they see (and roll back with) the other fixtures' rows
     def override_get_db():
         yield db
 
@@ -29,11 +49,6 @@ def client() -> TestClient:
 
     yield TestClient(app)
 
-    # Clean up by rolling back the transaction
-    db.close()
-    transaction.rollback()
-    connection.close()
-
 
 @pytest.fixture(scope="module")
 def valid_payload() -> dict:
@@ -47,3 +62,9 @@ def valid_payload() -> dict:
         "session_id": "s-12345-final",
         "details": {"message": "Final test successful."},
     }
+
+
+@pytest.fixture()
+def make_item(valid_payload: dict):
+    """valid_payload carrying `payload`, as an InteractionCreate (.model_dump(mode="json") for a request body)."""
+    return lambda payload: InteractionCreate(**{**valid_payload, "payload": payload})
@@ -10,3 +10,23 @@ def test_ask_basic():
     assert r.status_code == 200
     assert j["status"] == "DONE"
     assert len(j["results"]) == 5
+
+
+def test_ask_batch_matches_single_queries():
+    client = TestClient(app)
+    queries = ["batch one", "batch two", "safety signals"]
+    r = client.post("/ask/batch", json={"queries": queries, "k": 3})
+    j = r.json()
+    assert r.status_code == 200
+    assert [item["q"] for item in j["results"]] == queries
+    for item in j["results"]:
+        single = client.get("/ask", params={"q": item["q"], "k": 3}).json()
+        assert item["results"] == single["results"]
+
+
+def test_ask_debug2_returns_stage_timings():
+    client = TestClient(app)
+    j = client.get("/ask", params={"q": "stage timing probe", "k": 3, "debug": 2}).json()
+    stages = j["cache"]["stages_ns"]
+    assert {"normalize", "cache_lookup", "encode", "scan", "topk", "hits", "format"} <= set(stages)
+    assert all(isinstance(v, int) and v >= 0 for v in stages.values())
@@ -0,0 +1,51 @@
+import json
+
+import yaml
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routers import brief as brief_mod
+
+
+def test_brief_hashes_corpus_once_until_it_changes(tmp_path, monkeypatch):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text('{"chunk_id": "c0", "content": "x"}\n', encoding="utf-8")
+    cfg_p = tmp_path / "augury.local.yaml"
+    cfg_p.write_text(yaml.safe_dump({"paths": {"corpus": str(corpus)}}), encoding="utf-8")
+    monkeypatch.setattr(brief_mod, "CFG_PATH", cfg_p)
+
+    calls = []
+    real_sha256 = brief_mod._sha256
+    monkeypatch.setattr(brief_mod, "_sha256", lambda p: calls.append(p) or real_sha256(p))
+
+    client = TestClient(app)
+    first = client.get("/brief", params={"q": "safety signals", "k": 2}).json()
+    second = client.get("/brief", params={"q": "other question", "k": 2}).json()
+    assert len(calls) == 1
+    assert first["receipts"]["dataset_hash"] == second["receipts"]["dataset_hash"]
+
+    corpus.write_text('{"chunk_id": "c0", "content": "changed"}\n', encoding="utf-8")
+    third = client.get("/brief", params={"q": "safety signals", "k": 2}).json()
+    assert len(calls) == 2
+    assert third["receipts"]["dataset_hash"] != first["receipts"]["dataset_hash"]
+
+
+def test_brief_stream_emits_summary_claims_then_receipts(tmp_path, monkeypatch):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text('{"chunk_id": "c0", "content": "x"}\n', encoding="utf-8")
+    cfg_p = tmp_path / "augury.local.yaml"
+    cfg_p.write_text(yaml.safe_dump({"paths": {"corpus": str(corpus)}}), encoding="utf-8")
+    monkeypatch.setattr(brief_mod, "CFG_PATH", cfg_p)
+
+    client = TestClient(app)
+    r = client.get("/brief/stream", params={"q": "safety signals", "k": 3})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in r.text.splitlines()]
+    kinds = [e["type"] for e in events]
+    assert kinds[0] == "executive_summary"
+    assert kinds[1:4] == ["claim"] * 3
+    assert kinds[-1] == "receipts"
+
+    dossier = client.get("/brief", params={"q": "safety signals", "k": 3}).json()
+    assert [e["data"] for e in events if e["type"] == "claim"] == dossier["claims"]
@@ -0,0 +1,25 @@
+import numpy as np
+
+from api.services.embedding_cache import EmbeddingCache
+
+
+def test_embeddings_survive_restart_and_count_hits(tmp_path):
+    path = tmp_path / "emb.sqlite"
+    v = np.arange(4, dtype=np.float32)
+    EmbeddingCache(path).put_many("bge", {"safety signals": v})
+
+    cache = EmbeddingCache(path)  # fresh process view of the same file
+    got = cache.get_many("bge", ["safety signals", "unseen"])
+    assert np.array_equal(got["safety signals"], v)
+    assert "unseen" not in got
+    assert cache.get_many("other-model", ["safety signals"]) == {}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_eviction_keeps_cache_bounded(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite", max_entries=10)
+    for i in range(25):
+        cache.put_many("bge", {f"q{i}": np.full(2, i, dtype=np.float32)})
+    assert cache.stats()["entries"] <= 10
+    assert "q24" in cache.get_many("bge", ["q24"])
@@ -0,0 +1,41 @@
+from api.services.idempotency import MemoryIdempotencyStore, SqliteIdempotencyStore
+
+
+class Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_memory_store_dedupes_until_ttl():
+    clock = Clock()
+    store = MemoryIdempotencyStore(ttl_s=60, clock=clock)
+    assert store.claim("h1", {"id": "h1"}) == ({"id": "h1"}, True)
+    assert store.claim("h1", {"id": "other"}) == ({"id": "h1"}, False)
+    clock.t += 61
+    assert store.claim("h1", {"id": "again"}) == ({"id": "again"}, True)
+
+
+def test_memory_store_stays_within_byte_budget():
+    store = MemoryIdempotencyStore(max_bytes=2_000)
+    for i in range(10_000):
+        store.claim(f"{i:064x}", {"id": f"{i:064x}"})
+    assert store.bytes <= 2_000
+    assert 0 < len(store) < 50
+    assert store.stats()["evictions"] == 10_000 - len(store)
+    # most recent hash still dedupes
+    assert store.claim(f"{9_999:064x}", {})[1] is False
+
+
+def test_sqlite_store_is_shared_across_workers(tmp_path):
+    clock = Clock()
+    path = tmp_path / "idem.sqlite"
+    worker_a = SqliteIdempotencyStore(path, ttl_s=60, clock=clock)
+    worker_b = SqliteIdempotencyStore(path, ttl_s=60, clock=clock)
+    assert worker_a.claim("h1", {"id": "a"}) == ({"id": "a"}, True)
+    assert worker_b.claim("h1", {"id": "b"}) == ({"id": "a"}, False)
+    clock.t += 61
+    assert worker_b.claim("h1", {"id": "b"}) == ({"id": "b"}, True)
+    assert worker_a.stats()["entries"] == 1
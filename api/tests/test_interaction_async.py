@@ -0,0 +1,98 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from api.core.config import Settings  # noqa: E402
+from api.dependencies import get_async_db  # noqa: E402
+from api.models import Base  # noqa: E402
+from api.routers.interaction import async_router  # noqa: E402
+
+
+@pytest.fixture()
+def async_client():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with factory() as db:
+            yield db
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        yield
+        await engine.dispose()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(async_router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as client:
+        yield client
+
+
+def test_async_create_is_idempotent_and_listable(async_client: TestClient, valid_payload: dict):
+    first = async_client.post("/api/interaction/", json=valid_payload)
+    assert first.status_code == 201, first.text
+    second = async_client.post("/api/interaction/", json=valid_payload)
+    assert second.status_code == 200
+    assert second.json()["id"] == first.json()["id"]
+
+    listed = async_client.get("/api/interaction/", params={"include_payload": True})
+    assert [i["id"] for i in listed.json()] == [first.json()["id"]]
+    assert listed.json()[0]["payload"] == valid_payload["payload"]
+
+
+def test_async_url_is_derived_from_database_url():
+    def url(u: str) -> str:
+        return Settings(NAOK_FULCRUM_PRIME_KEY="k", NAOK_FULCRUM_SALT="s", DATABASE_URL=u).async_database_url
+
+    assert url("postgresql+psycopg2://u:p@db/ops") == "postgresql+asyncpg://u:p@db/ops"
+    assert url("postgres://u:p@db/ops") == "postgresql+asyncpg://u:p@db/ops"
+    assert url("sqlite:///./ops.db") == "sqlite+aiosqlite:///./ops.db"
+
+
+@pytest.fixture()
+def main_app_async(monkeypatch):
+    # api.main decides at import time whether the async routes are mounted: import a second copy
+    # with DB_ASYNC on; monkeypatch puts the original module (and the app conftest uses) back
+    import importlib
+    import sys
+
+    import api
+    from api.core.config import settings
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with factory() as db:
+            yield db
+
+    monkeypatch.setattr(settings, "DB_ASYNC", True)
+    monkeypatch.setattr(api, "main", sys.modules["api.main"])
+    monkeypatch.delitem(sys.modules, "api.main")
+    app = importlib.import_module("api.main").app
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as client:
+        client.portal.call(_create_all, engine)
+        yield client
+
+
+async def _create_all(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+def test_main_app_serves_create_and_list_from_the_async_routes(main_app_async: TestClient, valid_payload: dict):
+    created = main_app_async.post("/api/interaction/", json=valid_payload)
+    assert created.status_code == 201, created.text
+    listed = main_app_async.get("/api/interaction/")
+    assert [i["id"] for i in listed.json()] == [created.json()["id"]]
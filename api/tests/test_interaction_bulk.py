@@ -0,0 +1,26 @@
+from starlette.testclient import TestClient
+
+
+def test_bulk_reports_created_and_duplicate_per_item(client: TestClient, valid_payload: dict, make_item):
+    batch = [make_item(p).model_dump(mode="json") for p in ("bulk-a", "bulk-b", "bulk-a")]
+    r = client.post("/api/interaction/bulk", json=batch)
+    assert r.status_code == 201, r.text
+    body = r.json()
+    assert [i["status"] for i in body["items"]] == ["created", "created", "duplicate"]
+    assert (body["created"], body["duplicates"]) == (2, 1)
+    ids = [i["interaction"]["id"] for i in body["items"]]
+    assert ids[0] == ids[2] and ids[0] != ids[1]
+    assert body["items"][0]["interaction"]["agent_support"] == valid_payload["details"]
+
+    # Resubmitting resolves every item against the stored rows
+    again = client.post("/api/interaction/bulk", json=batch[:2])
+    assert again.status_code == 200
+    assert [i["status"] for i in again.json()["items"]] == ["duplicate", "duplicate"]
+    assert [i["interaction"]["id"] for i in again.json()["items"]] == ids[:2]
+
+    listed = client.get("/api/interaction/")
+    assert sorted(i["id"] for i in listed.json()) == sorted(ids[:2])
+
+
+def test_bulk_rejects_empty_batch(client: TestClient):
+    assert client.post("/api/interaction/bulk", json=[]).status_code == 422
@@ -0,0 +1,58 @@
+from sqlalchemy import delete, select
+
+from api.models import InteractionDedupe, InteractionLog
+from api.services import interaction as svc
+
+
+def test_dedupe_table_owns_each_hash_once(db, make_item):
+    first, created = svc.create_interaction(db, make_item("dd-1"))
+    again, created_again = svc.create_interaction(db, make_item("dd-1"))
+    assert (created, created_again) == (True, False)
+    assert again.id == first.id
+
+    claim = db.get(InteractionDedupe, first.payload_hash)
+    assert claim.interaction_id == first.id
+    assert db.scalar(select(InteractionLog.id).where(InteractionLog.payload_hash == first.payload_hash)) == first.id
+
+
+def test_orphaned_claim_is_repointed(db, make_item):
+    row, _ = svc.create_interaction(db, make_item("dd-orphan"))
+    db.execute(delete(InteractionLog).where(InteractionLog.id == row.id))  # as if its partition was dropped
+    db.commit()
+
+    fresh, created = svc.create_interaction(db, make_item("dd-orphan"))
+    assert created and fresh.id != row.id
+    assert db.get(InteractionDedupe, row.payload_hash).interaction_id == fresh.id
+
+
+def test_fallback_without_upsert_returning(monkeypatch, db, make_item):
+    monkeypatch.setattr(db.get_bind().dialect, "insert_returning", False)
+    first = svc.create_interactions_bulk(db, [make_item(p) for p in ("fb-1", "fb-2", "fb-1")])
+    assert [c for _, c in first] == [True, True, False]
+    ((row, created),) = svc.create_interactions_bulk(db, [make_item("fb-2")])
+    assert created is False and row.id == first[1][0].id
+
+
+def test_orphan_repoint_loses_to_a_concurrent_submitter(monkeypatch, db, make_item):
+    row, _ = svc.create_interaction(db, make_item("dd-race"))
+    db.execute(delete(InteractionLog).where(InteractionLog.id == row.id))
+    db.commit()
+
+    # another worker re-points the orphan between our claim and our UPDATE
+    real_rows_by_key = svc._rows_by_key
+    rival = {}
+
+    def rows_by_key_then_rival_wins(session, keys):
+        found = real_rows_by_key(session, keys)
+        if not rival:
+            monkeypatch.setattr(svc, "_rows_by_key", real_rows_by_key)
+            rival["row"], _ = svc.create_interaction(session, make_item("dd-race"))
+        return found
+
+    monkeypatch.setattr(svc, "_rows_by_key", rows_by_key_then_rival_wins)
+    mine, created = svc.create_interaction(db, make_item("dd-race"))
+    assert rival["row"].id != row.id
+    assert created is False and mine.id == rival["row"].id
+    assert db.scalars(select(InteractionLog.id).where(InteractionLog.payload_hash == row.payload_hash)).all() == [
+        rival["row"].id
+    ]
@@ -0,0 +1,104 @@
+import uuid
+from uuid import UUID
+
+import pytest
+from sqlalchemy import update
+from starlette.testclient import TestClient
+
+from api.dependencies import get_db
+from api.main import app
+from api.models import InteractionLog
+from api.services import interaction as interaction_service, lineage as lineage_service
+from api.services.lineage import AdjacencyCache
+
+
+def _create(client: TestClient, valid_payload: dict, payload: str, parent: str | None) -> str:
+    body = {**valid_payload, "payload": payload, "causality_id": parent}
+    r = client.post("/api/interaction/bulk", json=[body])
+    assert r.status_code == 201
+    return r.json()["items"][0]["interaction"]["id"]
+
+
+@pytest.fixture()
+def tree(client: TestClient, valid_payload: dict) -> dict:
+    # a ← b ← {c, d}, c ← e   (arrow: causality_id points at the parent)
+    ids = {"a": _create(client, valid_payload, "lin-a", valid_payload["causality_id"])}
+    ids["b"] = _create(client, valid_payload, "lin-b", ids["a"])
+    ids["c"] = _create(client, valid_payload, "lin-c", ids["b"])
+    ids["d"] = _create(client, valid_payload, "lin-d", ids["b"])
+    ids["e"] = _create(client, valid_payload, "lin-e", ids["c"])
+    return ids
+
+
+def _depths(body: dict, ids: dict) -> dict:
+    names = {v: k for k, v in ids.items()}
+    return {names[n["id"]]: n["depth"] for n in body["nodes"]}
+
+
+def test_lineage_walks_both_directions_with_depth_limit(client: TestClient, tree: dict):
+    r = client.get(f"/api/interaction/{tree['b']}/lineage", params={"depth": 1})
+    assert r.status_code == 200
+    body = r.json()
+    assert _depths(body, tree) == {"a": -1, "b": 0, "c": 1, "d": 1}
+    assert [n["depth"] for n in body["nodes"]] == sorted(n["depth"] for n in body["nodes"])
+    assert body["truncated"] is False
+
+    r = client.get(f"/api/interaction/{tree['e']}/lineage", params={"depth": 5})
+    assert _depths(r.json(), tree) == {"a": -3, "b": -2, "c": -1, "e": 0}
+
+
+def test_lineage_truncates_and_404s(client: TestClient, tree: dict):
+    r = client.get(f"/api/interaction/{tree['a']}/lineage", params={"depth": 5, "max_nodes": 3})
+    assert r.json()["truncated"] is True and len(r.json()["nodes"]) == 3
+
+    # truncation keeps the root and its nearest neighbours, not the far end of the chain
+    r = client.get(f"/api/interaction/{tree['e']}/lineage", params={"depth": 10, "max_nodes": 2})
+    assert r.json()["truncated"] is True
+    assert _depths(r.json(), tree) == {"c": -1, "e": 0}
+
+    missing = "00000000-0000-4000-8000-000000000000"
+    assert client.get(f"/api/interaction/{missing}/lineage").status_code == 404
+
+
+def test_lineage_cycle_keeps_root_at_depth_zero(client: TestClient, tree: dict):
+    db = next(app.dependency_overrides[get_db]())
+    db.execute(update(InteractionLog).where(InteractionLog.id == UUID(tree["a"])).values(causality_id=UUID(tree["e"])))
+    r = client.get(f"/api/interaction/{tree['a']}/lineage", params={"depth": 5})
+    depths = _depths(r.json(), tree)
+    assert depths["a"] == 0 and depths["e"] == -1 and depths["b"] == 1
+    assert [n["depth"] for n in r.json()["nodes"]] == sorted(n["depth"] for n in r.json()["nodes"])
+
+
+def test_adjacency_cache_serves_hot_chains_and_sees_new_children(
+    monkeypatch, client: TestClient, valid_payload: dict, tree: dict
+):
+    cache = AdjacencyCache(maxsize=100)
+    monkeypatch.setattr(lineage_service, "lineage_cache", lambda: cache)
+    monkeypatch.setattr(interaction_service, "lineage_cache", lambda: cache)
+
+    url = f"/api/interaction/{tree['b']}/lineage"
+    cold = client.get(url, params={"depth": 2}).json()
+    warm = client.get(url, params={"depth": 2}).json()
+    assert warm == cold
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    tree["f"] = _create(client, valid_payload, "lin-f", tree["d"])  # invalidates d's children
+    fresh = client.get(url, params={"depth": 2}).json()
+    assert _depths(fresh, tree)["f"] == 2
+    assert cache.misses == 2
+
+
+def test_adjacency_cache_children_expire_even_when_seen_at_the_horizon():
+    now = [0.0]
+    cache = AdjacencyCache(ttl_s=10, clock=lambda: now[0])
+    a, b = uuid.uuid4(), uuid.uuid4()
+    row = {c: None for c in lineage_service._COLS} | {"emitted_at_utc": 0}
+    node_a = {**row, "id": a, "depth": 0}
+    node_b = {**row, "id": b, "causality_id": a, "depth": 1}
+    cache.put([node_a, node_b], depth=1)  # a's children are known: (b,)
+
+    now[0] = 8.0
+    cache.put([{**node_a, "depth": 1}], depth=1)  # a again, but only at the horizon
+    assert cache._nodes[a][0] == 10.0 and cache._nodes[a][2] == (b,)
+    now[0] = 11.0
+    assert cache.walk(a, 1) is None  # a's children list expired on schedule
@@ -0,0 +1,58 @@
+import json
+
+from starlette.testclient import TestClient
+
+OTHER_AGENT = "0b7f3c1e-2d4a-4c55-9e61-7a8b9c0d1e2f"
+
+
+def _seed(client: TestClient, valid_payload: dict) -> list[dict]:
+    batch = [{**valid_payload, "payload": f"list-{i}"} for i in range(5)]
+    batch.append({**valid_payload, "payload": "list-other", "agent_id": OTHER_AGENT})
+    r = client.post("/api/interaction/bulk", json=batch)
+    assert r.status_code == 201
+    return [i["interaction"] for i in r.json()["items"]]
+
+
+def test_keyset_pages_cover_every_row_once(client: TestClient, valid_payload: dict):
+    seeded = _seed(client, valid_payload)
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/api/interaction/", params=params)
+        assert r.status_code == 200
+        seen += r.json()
+        pages += 1
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert pages == 3
+    assert sorted(i["id"] for i in seen) == sorted(i["id"] for i in seeded)
+    keys = [(i["emitted_at_utc"], i["id"]) for i in seen]
+    assert keys == sorted(keys)
+    assert all("payload" not in i for i in seen)
+
+
+def test_filters_and_payload_opt_in(client: TestClient, valid_payload: dict):
+    _seed(client, valid_payload)
+    r = client.get("/api/interaction/", params={"agent_id": OTHER_AGENT, "include_payload": True})
+    assert [i["payload"] for i in r.json()] == ["list-other"]
+
+    r = client.get("/api/interaction/", params={"causality_id": valid_payload["causality_id"]})
+    assert len(r.json()) == 6
+
+    r = client.get("/api/interaction/", params={"until": "2000-01-01T00:00:00"})
+    assert r.json() == []
+
+
+def test_stream_is_ndjson_in_keyset_order(client: TestClient, valid_payload: dict):
+    _seed(client, valid_payload)
+    r = client.get("/api/interaction/stream", params={"agent_id": valid_payload["agent_id"]})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert len(rows) == 5
+    assert rows == sorted(rows, key=lambda i: (i["emitted_at_utc"], i["id"]))
+
+
+def test_bad_cursor_is_400(client: TestClient):
+    assert client.get("/api/interaction/", params={"cursor": "not-a-cursor"}).status_code == 400
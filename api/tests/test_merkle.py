@@ -5,7 +5,7 @@ from datetime import datetime
 
 import pytest
 
-from truthrun.merkle import build_merkle_tree
+from truthrun.merkle import build_merkle_tree, hash_bytes
 
 
 @pytest.fixture
@@ -77,3 +77,48 @@ def test_odd_number_of_events_handles_last_leaf_correctly():
     assert root is not None
     assert len(root) == 32
     del os.environ["MERKLE_ANCHOR_ENABLED"]
+
+
+def test_accumulator_matches_batch_tree_and_proofs_verify():
+    """
+    Tests that appending leaves one at a time gives build_merkle_tree's root at every size,
+    and that every inclusion proof checks out against it.
+    """
+    import hashlib
+
+    from truthrun.merkle import MerkleAccumulator, levels_proof, merkle_levels, verify_proof
+
+    os.environ["MERKLE_ANCHOR_ENABLED"] = "True"
+    acc = MerkleAccumulator()
+    events = []
+    for n in range(1, 34):
+        events.append({"id": n})
+        acc.append(hashlib.sha256(json.dumps(events[-1], sort_keys=True).encode("utf-8")).digest())
+        assert acc.root() == build_merkle_tree(events)
+        assert len(acc.frontier) == bin(n).count("1")
+        levels = merkle_levels(acc.level(0).copy())
+        for i in range(n):
+            assert acc.proof(i) == levels_proof(levels, i)
+            assert verify_proof(acc.level(0)[i].tobytes(), i, acc.proof(i), acc.root(), n)
+    assert MerkleAccumulator(acc.level(0)).root() == acc.root()
+    assert not verify_proof(acc.level(0)[0].tobytes(), 1, acc.proof(0), acc.root(), len(acc))
+    del os.environ["MERKLE_ANCHOR_ENABLED"]
+
+
+def test_verify_proof_binds_the_index_to_the_tree_shape():
+    """
+    Tests that a proof only verifies at the position it was issued for: the odd node out's
+    self-pairing and the index bits above the tree height can't be used to forge positions.
+    """
+    from truthrun.merkle import MerkleAccumulator, verify_proof
+
+    acc = MerkleAccumulator()
+    for i in range(3):
+        acc.append(bytes([i]) * 32)
+    leaf, path, root = acc.level(0)[2].tobytes(), acc.proof(2), acc.root()
+    assert verify_proof(leaf, 2, path, root, 3)
+    assert not verify_proof(leaf, 3, path, root, 3)  # no leaf 3 in a tree of 3
+    assert not verify_proof(leaf, 3, path, root, 4)  # self-pairing is only allowed at the end of a level
+    assert not verify_proof(leaf, 6, path, root, 7)  # index bits above the height
+    assert not verify_proof(leaf, 2, path + [root], hash_bytes(root + root), 3)  # too long for the tree
+    assert not verify_proof(leaf, 2, path[:1], root, 3)  # too short
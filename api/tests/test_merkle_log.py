@@ -0,0 +1,151 @@
+import hashlib
+import json
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import delete, update
+from starlette.testclient import TestClient
+
+from api.models import InteractionLog
+from api.routers import merkle as merkle_router
+from api.services.merkle_log import LeafIndex, MerkleLog
+from api.truthrun.merkle import MerkleAccumulator, verify_proof
+
+
+def _h(s: str) -> str:
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def _bulk(client: TestClient, valid_payload: dict, *payloads: str) -> list[str]:
+    r = client.post("/api/interaction/bulk", json=[{**valid_payload, "payload": p} for p in payloads])
+    assert r.status_code == 201, r.text
+    return [item["interaction"]["payload_hash"] for item in r.json()["items"]]
+
+
+def test_checkpoints_are_paced_and_survive_restart(tmp_path):
+    now = [0.0]
+    mlog = MerkleLog(directory=tmp_path, checkpoint_every=4, checkpoint_s=60, clock=lambda: now[0])
+    assert mlog.append_many([_h("a"), _h("b"), _h("c")], seq=3) == 3
+    assert mlog.checkpoint is None and mlog.anchored_root() == ""
+    assert mlog.append_many([_h("c"), _h("d")], seq=5) == 1  # already-logged hashes are skipped
+    assert mlog.checkpoint["tree_size"] == 4
+
+    mlog.append_many([_h("e")], seq=6)
+    assert mlog.checkpoint["tree_size"] == 4
+    now[0] = 61.0
+    mlog.append_many([_h("f")], seq=7)
+    assert (mlog.checkpoint["tree_size"], mlog.checkpoint["seq"]) == (6, 7)
+    root = mlog.anchored_root()
+    mlog.append_many([_h("g")], seq=8)
+    assert mlog.anchored_root() == root  # the request path reads the checkpoint, never writes one
+
+    reader = MerkleLog(directory=tmp_path)  # another worker: the directory has one owner
+    assert not reader.stats()["persisted"]
+    assert (reader.anchored_root(), reader.stats()["tree_size"], reader.cursor) == (root, 6, 7)
+    reader.close()
+    mlog.close()  # checkpoints the 7th leaf
+
+    lines = (tmp_path / "checkpoints.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["tree_size"] for line in lines] == [4, 6, 7]
+    with (tmp_path / "leaves.bin").open("ab") as f:
+        f.write(bytes(32) + b"torn")  # a leaf past the checkpoint, then a crash mid-append
+    reopened = MerkleLog(directory=tmp_path)
+    assert reopened.stats()["persisted"] and reopened.cursor == 8
+    assert reopened.stats()["tree_size"] == 7
+    assert (tmp_path / "leaves.bin").stat().st_size == 7 * 32
+    reopened.close()
+
+
+def test_leaf_index_finds_every_leaf_across_rebuilds():
+    rng = np.random.default_rng(0)
+    leaves = rng.integers(0, 256, (10_000, 32), dtype=np.uint8)
+    leaves[1::2, :8] = leaves[::2, :8]  # every other leaf shares its 8-byte prefix with a neighbour
+    acc = MerkleAccumulator(leaves[:3000])
+    index = LeafIndex(acc.level(0))
+    for leaf in leaves[3000:]:
+        index.add(leaf.tobytes(), acc.append(leaf.tobytes()), acc.level(0))
+    assert all(index.get(leaves[i].tobytes()) == i for i in range(0, 10_000, 7))
+    missing = leaves[0].copy()
+    missing[31] ^= 1
+    assert index.get(missing.tobytes()) is None
+
+
+def test_workers_derive_the_same_tree_from_the_table(client: TestClient, session_factory, valid_payload: dict):
+    early_rows = _bulk(client, valid_payload, "merkle-0", "merkle-1")
+    early = MerkleLog(session_factory)
+    assert early.sync() == 2  # rows written before the log existed are logged too
+    assert early.anchored_root() != ""
+    hashes = _bulk(client, valid_payload, *[f"merkle-{i}" for i in range(5)], "merkle-0")
+    assert hashes[:2] == early_rows
+
+    # a commit stamped long before the rows already synced is still taken in: the cursor is seq, not time
+    db = session_factory()
+    db.execute(
+        update(InteractionLog)
+        .where(InteractionLog.payload_hash == hashes[4])
+        .values(emitted_at_utc=datetime(2000, 1, 1))
+    )
+    db.commit()
+    assert early.sync() == 3
+
+    late = MerkleLog(session_factory)  # another worker, or a restart, that only ever saw the table
+    late.sync()
+    assert late.acc.root() == early.acc.root()
+    assert late.stats()["tree_size"] == early.stats()["tree_size"] == 5
+    for payload_hash in hashes:
+        proof = late.proof(payload_hash)
+        assert proof == early.proof(payload_hash)
+        leaf, root = bytes.fromhex(proof["leaf"]), bytes.fromhex(proof["root"])
+        path = [bytes.fromhex(p) for p in proof["path"]]
+        assert verify_proof(leaf, proof["index"], path, root, proof["tree_size"])
+    assert late.proof(_h("never logged")) is None
+
+
+def test_readers_replay_the_owners_leaves_past_retention(tmp_path, client: TestClient, session_factory, valid_payload):
+    hashes = _bulk(client, valid_payload, "kept-0", "kept-1", "kept-2")
+    owner = MerkleLog(session_factory, directory=tmp_path)
+    owner.sync()
+    db = session_factory()
+    db.execute(delete(InteractionLog).where(InteractionLog.payload_hash == hashes[0]))  # its partition expired
+    db.commit()
+    hashes += _bulk(client, valid_payload, "kept-3")
+
+    reader = MerkleLog(session_factory, directory=tmp_path)
+    reader.sync()
+    owner.sync()
+    assert not reader.stats()["persisted"]
+    assert reader.acc.root() == owner.acc.root() and reader.stats()["tree_size"] == 4
+    assert reader.proof(hashes[0]) == owner.proof(hashes[0])
+    assert MerkleLog(session_factory).sync() == 3  # the table alone no longer has it
+    reader.close()
+    owner.close()
+
+
+def test_proof_and_verify_endpoints(monkeypatch, client: TestClient, session_factory, valid_payload: dict):
+    leaf = _bulk(client, valid_payload, "audit-0", "audit-1", "audit-2")[1]
+    mlog = MerkleLog(session_factory, proof_cache=2)
+    mlog.sync()
+    monkeypatch.setattr(merkle_router, "merkle_log", lambda: mlog)
+
+    proof = client.get(f"/api/merkle/proof/{leaf}").json()
+    assert proof["index"] == 1 and proof["tree_size"] == 3  # seq order is the order of the bulk
+    assert client.get(f"/api/merkle/proof/{leaf.upper()}").json() == proof
+    assert mlog.stats()["proof_cache_hits"] == 1
+
+    body = {k: proof[k] for k in ("leaf", "index", "tree_size", "path", "root")}
+    assert client.post("/api/merkle/verify", json=body).json() == {"valid": True}
+    assert client.post("/api/merkle/verify", json={**body, "index": 0}).json() == {"valid": False}
+    assert client.post("/api/merkle/verify", json={**body, "index": 5, "tree_size": 6}).json() == {"valid": False}
+    unsized = {k: v for k, v in body.items() if k != "tree_size"}
+    assert client.post("/api/merkle/verify", json=unsized).status_code == 422
+    assert client.post("/api/merkle/verify", json={**body, "root": "z" * 64}).status_code == 422
+
+    fresh = _bulk(client, valid_payload, "audit-3")[0]
+    assert client.get(f"/api/merkle/proof/{fresh}").status_code == 404  # not synced yet
+    mlog.sync()
+    assert client.get(f"/api/merkle/proof/{leaf}").json()["tree_size"] == 4  # a grown tree re-issues
+
+    assert client.get(f"/api/merkle/proof/{_h('never logged')}").status_code == 404
+    assert client.get("/api/merkle/proof/not-a-hash").status_code == 422
+    monkeypatch.setattr(merkle_router, "merkle_log", lambda: None)
+    assert client.get(f"/api/merkle/proof/{leaf}").status_code == 503
@@ -0,0 +1,42 @@
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+from api.services.partitions import PartitionPolicy, maintain, plan
+
+NOW = datetime(2026, 3, 1, 13, 30, tzinfo=UTC)
+
+
+def test_daily_plan_premakes_ahead_and_skips_existing():
+    policy = PartitionPolicy(granularity="day", premake=2, lookback=1)
+    steps = plan(policy, NOW, existing={"interaction_log_p20260301"})
+    assert [name for name, _, _ in steps["create"]] == [
+        "interaction_log_p20260228",
+        "interaction_log_p20260302",
+        "interaction_log_p20260303",
+    ]
+    name, lo, hi = steps["create"][0]
+    assert (lo, hi) == (datetime(2026, 2, 28, tzinfo=UTC), datetime(2026, 3, 1, tzinfo=UTC))
+    assert steps["expire"] == []
+
+
+def test_monthly_plan_crosses_year_and_expires_by_upper_bound():
+    policy = PartitionPolicy(granularity="month", premake=10, lookback=0, retention=3)
+    existing = {
+        "interaction_log_p202511",  # ends 2025-12-01: expired (cutoff 2025-12-01)
+        "interaction_log_p202512",  # ends 2026-01-01: kept
+        "interaction_log_p20251115",  # leftover daily partition, expired by its own range
+        "interaction_log_default",  # unmanaged
+    }
+    steps = plan(policy, NOW, existing)
+    created = [name for name, _, _ in steps["create"]]
+    assert created[0] == "interaction_log_p202603" and created[-1] == "interaction_log_p202701"
+    assert steps["expire"] == ["interaction_log_p202511", "interaction_log_p20251115"]
+
+
+def test_policy_validates_and_sqlite_is_a_noop():
+    with pytest.raises(ValueError):
+        PartitionPolicy(granularity="week")
+    report = maintain(create_engine("sqlite://"), PartitionPolicy(retention=1))
+    assert report["skipped"] is True and report["created"] == []
@@ -0,0 +1,67 @@
+import hashlib
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+from api.services.payload_codec import CodecError, PayloadCodec, zstandard
+
+needs_zstd = pytest.mark.skipif(zstandard is None, reason="zstandard not installed")
+BIG = json.dumps({"observation": ["agent heartbeat ok"] * 200})
+
+
+@pytest.mark.parametrize(
+    "codec",
+    ["zlib", pytest.param("zstd", marks=pytest.mark.skipif(zstandard is None, reason="zstandard not installed"))],
+)
+def test_round_trip_and_small_payloads_stay_raw(codec):
+    c = PayloadCodec(codec=codec)
+    codec_id, blob = c.encode(BIG.encode())
+    assert codec_id == codec and len(blob) < len(BIG) // 5
+    assert c.decode(codec_id, blob) == BIG.encode()
+    assert c.encode(b"tiny") == ("raw", b"tiny")
+
+
+@needs_zstd
+def test_zstd_dictionary_id_is_recorded_and_required():
+    samples = [json.dumps({"agent": i, "status": "ok", "retries": i % 3}).encode() * 4 for i in range(400)]
+    d = zstandard.train_dictionary(4096, samples).as_bytes()
+    c = PayloadCodec(codec="zstd", zstd_dict=d, min_bytes=16)
+    codec_id, blob = c.encode(samples[7])
+    assert codec_id.startswith("zstd:")
+    assert c.decode(codec_id, blob) == samples[7]
+    with pytest.raises(CodecError):
+        PayloadCodec(codec="zstd").decode(codec_id, blob)
+
+
+def test_stored_compressed_hash_over_raw_and_decoded_on_request(client: TestClient, valid_payload: dict):
+    r = client.post("/api/interaction/bulk", json=[{**valid_payload, "payload": BIG}])
+    item = r.json()["items"][0]["interaction"]
+    assert item["payload_hash"] == hashlib.sha256(BIG.encode()).hexdigest()
+
+    listed = client.get("/api/interaction/", params={"include_payload": True}).json()
+    assert listed[0]["payload"] == BIG
+
+
+def test_undecodable_row_is_marked_not_fatal(client: TestClient, valid_payload: dict):
+    import uuid
+
+    from sqlalchemy import update
+
+    from api.dependencies import get_db
+    from api.main import app
+    from api.models import InteractionLog
+
+    r = client.post("/api/interaction/bulk", json=[{**valid_payload, "payload": p} for p in ("ok-row", "bad-row")])
+    bad_id = r.json()["items"][1]["interaction"]["id"]
+    db = next(app.dependency_overrides[get_db]())
+    # as if written with a zstd dictionary this process no longer has
+    db.execute(update(InteractionLog).where(InteractionLog.id == uuid.UUID(bad_id)).values(payload_codec="zstd:999"))
+
+    for url in ("/api/interaction/", "/api/interaction/stream"):
+        resp = client.get(url, params={"include_payload": True})
+        assert resp.status_code == 200
+        body = resp.json() if url.endswith("/") else [json.loads(line) for line in resp.text.splitlines()]
+        by_id = {i["id"]: i for i in body}
+        assert by_id[bad_id]["payload"] is None and "zstd" in by_id[bad_id]["payload_error"]
+        assert [i["payload"] for i in body if i["id"] != bad_id] == ["ok-row"]
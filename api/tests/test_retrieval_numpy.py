@@ -0,0 +1,186 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from api.services import retrieval_numpy
+from api.services.retrieval_numpy import CorpusText, NumpySearch, _load_searcher, _offsets_path, topk_stable
+
+
+def _write_corpus(path, rows):
+    with path.open("w", encoding="utf-8") as f:
+        for i, text in enumerate(rows):
+            f.write(json.dumps({"chunk_id": f"c{i}", "content": text}) + "\n")
+            if i == 0:
+                f.write("\n")  # blank lines are skipped by build_numpy_index too
+
+
+def test_corpus_text_reads_rows_lazily(tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    _write_corpus(corpus, ["alpha", "βeta ünïcode", "gamma"])
+
+    texts = CorpusText(corpus, 3)
+    assert len(texts) == 3
+    assert [texts[i] for i in range(3)] == ["alpha", "βeta ünïcode", "gamma"]
+    # offsets are persisted for the next worker/start
+    assert _offsets_path(corpus).exists()
+    assert CorpusText(corpus, 3)[2] == "gamma"
+
+
+def test_whitespace_only_lines_are_not_rows(tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    _write_corpus(corpus, ["alpha", "beta"])
+    with corpus.open("a", encoding="utf-8") as f:
+        f.write("        \t  \r\n\u00a0\u3000\n")  # longer than any short-line shortcut; unicode spaces too
+        f.write(json.dumps({"chunk_id": "c2", "content": "gamma"}) + "\r\n")
+
+    texts = CorpusText(corpus, 3)
+    assert [texts[i] for i in range(3)] == ["alpha", "beta", "gamma"]
+
+
+def _unit_rows(n, d, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, d)).astype("float32")
+    return X / np.linalg.norm(X, axis=1, keepdims=True)
+
+
+def test_missing_ann_index_falls_back_to_numpy(tmp_path):
+    X = _unit_rows(50, 8)
+    cfg = {"index": {"backend": "faiss_ivf", "path": str(tmp_path / "absent.ivf")}}
+    assert isinstance(_load_searcher(cfg, X), NumpySearch)
+
+
+def test_faiss_flat_backend_matches_numpy(tmp_path):
+    faiss = pytest.importorskip("faiss")
+    X = _unit_rows(200, 16)
+    idx = faiss.IndexFlatIP(16)
+    idx.add(X)
+    path = str(tmp_path / "index.faiss")
+    faiss.write_index(idx, path)
+
+    searcher = _load_searcher({"index": {"backend": "faiss", "path": path}}, X)
+    assert searcher.name == "faiss"
+    got_ids, got_scores = searcher.search(X[3], 5)
+    want_ids, want_scores = NumpySearch(X).search(X[3], 5)
+    assert got_ids.tolist() == want_ids.tolist()
+    assert np.allclose(got_scores, want_scores)
+
+
+def test_topk_stable_matches_full_sort_with_id_tiebreak():
+    rng = np.random.default_rng(1)
+    # coarse scores force plenty of ties at the k-th boundary
+    sims = rng.integers(0, 8, size=1000).astype("float32") / 8
+    full = np.lexsort((np.arange(sims.size), -sims))
+    for k in (1, 5, 20, 1000):
+        assert topk_stable(sims, k).tolist() == full[:k].tolist()
+
+
+def test_microbatcher_coalesces_concurrent_misses(monkeypatch):
+    calls = []
+    real_encode = retrieval_numpy._encode
+
+    def counting_encode(qs):
+        calls.append(list(qs))
+        return real_encode(qs)
+
+    monkeypatch.setattr(retrieval_numpy, "_encode", counting_encode)
+    retrieval_numpy._RESULTS.cache_clear()
+    batcher = retrieval_numpy.MicroBatcher(window_ms=20, max_batch=64)
+
+    async def run():
+        return await asyncio.gather(*(batcher.ask(f"mb query {i % 5}", 3) for i in range(20)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert sorted(calls[0]) == sorted(f"mb query {i}" for i in range(5))
+    assert all(len(r) == 3 for r in results)
+
+
+def _write_index(tmp_path, rows, tag):
+    X = np.zeros((len(rows), 4), dtype="float32")
+    X[:, 0] = 1.0
+    np.save(tmp_path / "index.npy", X)
+    (tmp_path / "index.ids.json").write_text(json.dumps({i: f"{tag}_{i}" for i in range(len(rows))}))
+    _write_corpus(tmp_path / "corpus.jsonl", rows)
+    (tmp_path / "index_manifest.json").write_text(json.dumps({"count": len(rows), "tag": tag}))
+
+
+def test_hot_reload_swaps_generation_and_drops_stale_results(tmp_path, monkeypatch):
+    cfg = {
+        "paths": {
+            "corpus": str(tmp_path / "corpus.jsonl"),
+            "index": str(tmp_path / "index.npy"),
+            "id_map": str(tmp_path / "index.ids.json"),
+            "manifest": str(tmp_path / "index_manifest.json"),
+        },
+        "embeddings": {"model": "dummy", "dim": 4, "cache_path": ""},
+        "index": {"reload_check_s": 0},
+    }
+    monkeypatch.setattr(retrieval_numpy, "_cfg", lambda: cfg)
+    monkeypatch.setattr(retrieval_numpy, "_GEN", None)
+    monkeypatch.setattr(
+        retrieval_numpy, "_embedder", lambda: type("E", (), {"encode": lambda self, qs: np.ones((len(qs), 4))})()
+    )
+    _write_index(tmp_path, ["old a", "old b"], "v1")
+
+    assert [r["chunk_id"] for r in retrieval_numpy.ask_numpy("reload me", 2)] == ["v1_0", "v1_1"]
+    assert retrieval_numpy.reload_index() is False  # manifest unchanged
+
+    _write_index(tmp_path, ["new a", "new b", "new c"], "v2")
+    assert retrieval_numpy.reload_index() is True
+    hits = retrieval_numpy.ask_numpy("reload me", 3)
+    assert [r["text"] for r in hits] == ["new a", "new b", "new c"]
+    old_gen = [key for key in retrieval_numpy._RESULTS._data if key[0] != retrieval_numpy._GEN.gen_id]
+    assert old_gen == []
+
+
+@pytest.mark.parametrize("fmt", ["int8", "float16"])
+def test_quantized_first_pass_with_rerank_matches_exact(fmt):
+    X = _unit_rows(2000, 32, seed=3)
+    Xq, scales = retrieval_numpy.quantize_rows(X, fmt)
+    searcher = retrieval_numpy.QuantizedSearch(X, Xq, scales, rerank=64, block=300)  # ragged last block
+    exact = NumpySearch(X)
+    deq = Xq.astype(np.float32) * (scales[:, None] if scales is not None else 1.0)
+    assert np.allclose(searcher._approx(X[:3]), deq @ X[:3].T, atol=1e-5)
+    for row in (0, 7, 1999):
+        got_ids, got_scores = searcher.search(X[row], 10)
+        want_ids, want_scores = exact.search(X[row], 10)
+        assert got_ids.tolist() == want_ids.tolist()
+        assert np.allclose(got_scores, want_scores)
+
+
+def test_stale_quantized_sidecars_fall_back_to_exact(tmp_path, caplog):
+    import os
+    import subprocess
+    import sys
+
+    p_index = tmp_path / "index.npy"
+    np.save(p_index, _unit_rows(100, 8, seed=5))
+    script = os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "quantize_index.py")
+    subprocess.run([sys.executable, script, "--input", str(p_index), "--formats", "int8"], check=True)
+
+    cfg = {"paths": {"index": str(p_index)}, "index": {"quantized": "int8"}}
+    X = np.load(p_index)
+    assert isinstance(_load_searcher(cfg, X), retrieval_numpy.QuantizedSearch)
+
+    np.save(p_index, _unit_rows(100, 8, seed=6))  # rebuilt, same shape, sidecars not refreshed
+    os.utime(p_index, ns=(0, 1))
+    with caplog.at_level("WARNING"):
+        assert isinstance(_load_searcher(cfg, np.load(p_index)), NumpySearch)
+    assert "quantize_index.py" in caplog.text
+
+
+def test_unloadable_ann_index_is_logged_and_reported(tmp_path, caplog):
+    bogus = tmp_path / "broken.hnsw"
+    bogus.write_bytes(b"not an index")
+    cfg = {
+        "paths": {"corpus": "", "index": "", "id_map": "", "manifest": ""},
+        "embeddings": {"dim": 8},
+        "index": {"backend": "hnsw", "path": str(bogus)},
+    }
+    with caplog.at_level("WARNING"):
+        gen = retrieval_numpy.Generation("g1", cfg)
+    assert isinstance(gen.searcher, NumpySearch) and gen.configured == "hnsw"
+    assert "index.backend 'hnsw' failed to load" in caplog.text
+    assert caplog.records[-1].exc_info is not None
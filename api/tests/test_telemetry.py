@@ -0,0 +1,78 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from api import main
+from api.middleware import telemetry
+from api.services.telemetry import RecentSet, TelemetrySink
+
+
+def test_requests_only_append_and_flusher_writes_batches(tmp_path, monkeypatch):
+    out = tmp_path / "telemetry.jsonl"
+    sink = TelemetrySink(path=str(out), capacity=4, flush_ms=60_000)
+    monkeypatch.setattr(telemetry, "SINK", sink)
+    monkeypatch.setattr(telemetry.SETTINGS, "log", True)
+
+    client = TestClient(main.app)
+    for _ in range(2):
+        client.get("/ask", params={"q": "telemetry probe", "k": 2})
+    assert not out.exists()  # nothing written on the request path
+
+    assert sink.flush() == 2
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [line["cache_hit"] for line in lines] == [0, 1]
+    assert lines[0]["route"] == "/ask" and lines[0]["ts"].endswith("Z")
+
+
+def test_ring_and_seen_set_stay_bounded():
+    sink = TelemetrySink(capacity=3, flush_ms=60_000)
+    sink._thread = object()  # keep the flusher out of this test
+    for i in range(10):
+        sink.emit({"i": i})
+    assert len(sink._ring) == 3 and sink.dropped == 7
+
+    seen = RecentSet(maxsize=100)
+    for i in range(1000):
+        seen.check_and_add(f"q{i}")
+    assert len(seen) == 100
+    assert seen.check_and_add("q999") is True
+
+
+def test_metrics_exposes_route_histograms_and_retrieval_counters():
+    client = TestClient(main.app)
+    client.get("/ask", params={"q": "metrics probe", "k": 2})
+    client.get("/ask", params={"q": "metrics probe", "k": 2})
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    body = r.text
+    assert 'http_request_duration_ms_bucket{route="/ask",method="GET",status="200",le="150"}' in body
+    assert 'http_request_duration_ms_count{route="/ask",method="GET",status="200"}' in body
+    assert "ask_result_cache_hits_total" in body
+    assert 'ask_index_info{backend="numpy"' in body
+
+
+def test_stage_timings_flow_into_telemetry_line(tmp_path, monkeypatch):
+    out = tmp_path / "telemetry.jsonl"
+    sink = TelemetrySink(path=str(out), capacity=4, flush_ms=60_000)
+    monkeypatch.setattr(telemetry, "SINK", sink)
+    monkeypatch.setattr(telemetry.SETTINGS, "log", True)
+
+    TestClient(main.app).get("/ask", params={"q": "stage telemetry probe", "k": 2, "debug": 2})
+    sink.flush()
+    line = json.loads(out.read_text().splitlines()[0])
+    assert "encode" in line["stages_ns"]
+
+
+def test_sampling_rate_zero_keeps_metrics_but_skips_lines(monkeypatch):
+    sink = TelemetrySink(capacity=8, flush_ms=60_000)
+    sink._thread = object()  # keep the flusher out of this test
+    monkeypatch.setattr(telemetry, "SINK", sink)
+    monkeypatch.setattr(telemetry.SETTINGS, "log", True)
+    monkeypatch.setattr(telemetry.SETTINGS, "sample_rate", 0.0)
+
+    before = telemetry.METRICS.histograms.get(("/", "GET", 200))
+    before = before.total if before else 0
+    TestClient(main.app).get("/")
+    assert len(sink._ring) == 0
+    assert telemetry.METRICS.histograms[("/", "GET", 200)].total == before + 1
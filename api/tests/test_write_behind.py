@@ -0,0 +1,100 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from api.dependencies import get_db
+from api.models import InteractionLog
+from api.routers import interaction as interaction_router
+from api.services import write_behind as write_behind_service
+from api.services.write_behind import QueueFull, WriteBehindLog
+
+
+def test_group_commit_writes_and_dedupes(session_factory, make_item):
+    wb = WriteBehindLog(session_factory, max_queue=100, batch_size=3, flush_ms=5)
+    hashes = [wb.submit(make_item(p)) for p in ("wb-a", "wb-b", "wb-c", "wb-d", "wb-a")]
+    wb.close()
+
+    assert wb.depth() == 0
+    assert wb.stats["written"] == 4 and wb.stats["duplicates"] == 1
+    assert wb.stats["batches"] >= 2  # batch_size=3 forces at least two group commits
+    db = session_factory()
+    stored = {r.payload_hash for r in db.query(InteractionLog)}
+    assert stored == set(hashes)
+
+
+def test_full_queue_rejects_and_closed_log_refuses(session_factory, make_item):
+    wb = WriteBehindLog(session_factory, max_queue=1, batch_size=10, flush_ms=5)
+    wb._thread = object()  # hold the flusher off so the queue stays full
+    wb.submit(make_item("wb-full-1"))
+    with pytest.raises(QueueFull):
+        wb.submit(make_item("wb-full-2"))
+    assert wb.stats["rejected"] == 1
+
+    wb._thread = None
+    wb.close()
+    assert wb.stats["written"] == 1
+    with pytest.raises(QueueFull):
+        wb.submit(make_item("wb-full-3"))
+
+
+def test_route_returns_202_then_429(monkeypatch, session_factory, valid_payload: dict):
+    wb = WriteBehindLog(session_factory, max_queue=1, batch_size=10, flush_ms=5)
+    wb._thread = object()
+    monkeypatch.setattr(interaction_router, "write_behind", lambda: wb)
+
+    app = FastAPI()
+    app.include_router(interaction_router.router)
+    app.dependency_overrides[get_db] = lambda: None  # write-behind path never touches the request session
+    client = TestClient(app)
+
+    first = client.post("/api/interaction/", json={**valid_payload, "payload": "wb-route-1"})
+    assert first.status_code == 202
+    assert first.json()["status"] == "accepted" and len(first.json()["payload_hash"]) == 64
+
+    second = client.post("/api/interaction/", json={**valid_payload, "payload": "wb-route-2"})
+    assert second.status_code == 429
+    assert second.headers["retry-after"] == "1"
+
+
+def test_main_app_routes_create_through_write_behind(monkeypatch, client: TestClient, session_factory, valid_payload):
+    # the full app, not a bare router: /api/interaction must not be answered by an in-memory alias
+    wb = WriteBehindLog(session_factory, max_queue=10, batch_size=10, flush_ms=5)
+    monkeypatch.setattr(interaction_router, "write_behind", lambda: wb)
+
+    for path in ("/api/interaction/", "/api/interaction"):
+        r = client.post(path, json={**valid_payload, "payload": f"wb-main-{path}"})
+        assert r.status_code == 202, r.text
+    wb.close()
+    assert wb.stats["written"] == 2
+
+
+def test_failed_flush_retries_then_dead_letters_the_bad_item(monkeypatch, tmp_path, session_factory, make_item):
+    real = write_behind_service.create_interactions_bulk
+    calls = {"n": 0}
+
+    def flaky(db, batch):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise RuntimeError("connection reset")  # transient: the retry lands the batch
+        if any(i.payload == "wb-poison" for i in batch):
+            raise ValueError("poison")
+        return real(db, batch)
+
+    monkeypatch.setattr(write_behind_service, "create_interactions_bulk", flaky)
+    wb = WriteBehindLog(session_factory, batch_size=10, retries=2, backoff_ms=0, dead_letter=tmp_path / "dead.jsonl")
+    wb._thread = object()  # flush() below writes each batch whole
+    for p in ("wb-retry-a", "wb-retry-b"):
+        wb.submit(make_item(p))
+    wb.flush()
+    assert wb.stats["written"] == 2 and wb.stats["retries"] == 1 and wb.stats["failed"] == 0
+
+    for p in ("wb-split-a", "wb-poison", "wb-split-b"):
+        wb.submit(make_item(p))
+    wb.flush()
+    assert wb.stats["written"] == 4 and wb.stats["retries"] == 3 and wb.stats["failed"] == 1
+    dead = [json.loads(line) for line in (tmp_path / "dead.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [d["payload"] for d in dead] == ["wb-poison"]
+    stored = {r.payload_hash for r in session_factory().query(InteractionLog)}
+    assert len(stored) == 4
@@ -5,12 +5,42 @@ import os
 
 import numpy as np
 
+DIGEST = 32  # sha256 bytes per node
+
 
 def hash_bytes(data: bytes) -> bytes:
     """SHA256 digest on bytes."""
     return hashlib.sha256(data).digest()
 
 
+def _hash_pairs(level: np.ndarray) -> np.ndarray:
+    """(2m, 32) uint8 → (m, 32): sha256 over each adjacent pair, read straight from the buffer."""
+    pairs = np.ascontiguousarray(level).reshape(-1, 2 * DIGEST)
+    out = b"".join(hashlib.sha256(p).digest() for p in pairs)
+    return np.frombuffer(out, dtype=np.uint8).reshape(-1, DIGEST)
+
+
+def merkle_levels(leaves: np.ndarray) -> list[np.ndarray]:
+    """Every level of the tree over (n, 32) uint8 leaf digests, leaves first, root last."""
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        if len(level) % 2:
+            level = np.concatenate([level, level[-1:]])  # odd node out is paired with itself
+        levels.append(_hash_pairs(level))
+    return levels
+
+
+def levels_proof(levels: list[np.ndarray], index: int) -> list[bytes]:
+    """Sibling digests from leaf `index` to the root of a merkle_levels() tree."""
+    path, k = [], index
+    for level in levels[:-1]:
+        sib = k ^ 1 if (k ^ 1) < len(level) else k
+        path.append(level[sib].tobytes())
+        k //= 2
+    return path
+
+
 def build_merkle_tree(events: list[dict]) -> bytes | None:
     """Build binary Merkle tree root from event batch."""
     if not os.getenv("MERKLE_ANCHOR_ENABLED", "False") == "True":
@@ -21,18 +51,125 @@ def build_merkle_tree(events: list[dict]) -> bytes | None:
 
     # Bytes conversion: JSON dump sorted for determinism
     leaf_bytes = [json.dumps(event, sort_keys=True).encode("utf-8") for event in events]
-    leaves = np.array([hash_bytes(b) for b in leaf_bytes], dtype=object)
-
-    # Tree levels: Vectorized build
-    tree = [leaves]
-    while len(tree[-1]) > 1:
-        level = tree[-1]
-        next_level = np.empty((len(level) + 1) // 2, dtype=object)
-        for i in range(0, len(level), 2):
-            left = level[i]
-            right = level[i + 1] if i + 1 < len(level) else left
-            combined = left + right
-            next_level[i // 2] = hash_bytes(combined)
-        tree.append(next_level)
-
-    return tree[-1][0]  # Root digest
+    leaves = np.frombuffer(b"".join(hash_bytes(b) for b in leaf_bytes), dtype=np.uint8).reshape(-1, DIGEST)
+
+    return merkle_levels(leaves)[-1][0].tobytes()  # Root digest
+
+
+class MerkleAccumulator:
+    """
+    Append-only Merkle tree over 32-byte leaf digests, same shape as build_merkle_tree
+    (an odd node out at any level is paired with itself).
+
+    Only complete nodes are stored, one contiguous (capacity, 32) uint8 buffer per level,
+    grown by doubling: level(h)[k] covers leaves k*2^h .. (k+1)*2^h - 1. The frontier (the
+    unpaired last node of each odd-length level, one per set bit of n) is what append()
+    carries into, so an append costs O(log n) hashes amortized O(1). The partial nodes on the
+    right edge are recomputed in O(log n) when a root or proof is asked for.
+    """
+
+    def __init__(self, leaves: np.ndarray | None = None):
+        self._bufs: list[np.ndarray] = [np.empty((64, DIGEST), dtype=np.uint8)]
+        self._counts: list[int] = [0]
+        self._edge: list[bytes] | None = None
+        if leaves is not None and len(leaves):
+            self._load(leaves)
+
+    def _load(self, leaves: np.ndarray) -> None:
+        # bulk start (e.g. a replayed log): complete nodes of level h+1 pair up those of level h
+        level, h = np.ascontiguousarray(leaves, dtype=np.uint8), 0
+        while len(level):
+            if h == len(self._bufs):
+                self._bufs.append(None)
+                self._counts.append(0)
+            self._bufs[h] = np.empty((max(64, 2 * len(level)), DIGEST), dtype=np.uint8)
+            self._bufs[h][: len(level)] = level
+            self._counts[h] = len(level)
+            level, h = _hash_pairs(level[: len(level) - len(level) % 2]), h + 1
+
+    def __len__(self) -> int:
+        return self._counts[0]
+
+    def level(self, h: int) -> np.ndarray:
+        """The complete nodes of level h, as an (m, 32) view."""
+        return self._bufs[h][: self._counts[h]]
+
+    def _push(self, h: int, node) -> None:
+        if h == len(self._bufs):
+            self._bufs.append(np.empty((64, DIGEST), dtype=np.uint8))
+            self._counts.append(0)
+        buf, c = self._bufs[h], self._counts[h]
+        if c == len(buf):
+            buf = self._bufs[h] = np.concatenate([buf, np.empty_like(buf)])
+        buf[c] = np.frombuffer(node, dtype=np.uint8)
+        self._counts[h] = c + 1
+
+    def append(self, leaf: bytes) -> int:
+        """Add one leaf digest; returns its index."""
+        index = len(self)
+        self._push(0, leaf)
+        h = 0
+        while self._counts[h] % 2 == 0:  # completed a pair: carry up
+            c = self._counts[h]
+            self._push(h + 1, hashlib.sha256(self._bufs[h][c - 2 : c]).digest())
+            h += 1
+        self._edge = None
+        return index
+
+    @property
+    def frontier(self) -> list[bytes]:
+        """Roots of the perfect subtrees still waiting for a right sibling, lowest level first."""
+        return [buf[c - 1].tobytes() for buf, c in zip(self._bufs, self._counts, strict=True) if c % 2]
+
+    def _right_edge(self) -> list[bytes]:
+        # edge[h] = last node of level h (there are ceil(n / 2^h) of them), complete or not
+        if self._edge is None:
+            edge = [self._bufs[0][len(self) - 1].tobytes()]
+            count, h = len(self), 0
+            while count > 1:
+                k = count - 1
+                left = self._bufs[h][k - 1].tobytes() if k % 2 else edge[h]  # a left sibling is always complete
+                edge.append(hash_bytes(left + edge[h]))
+                count, h = (count + 1) // 2, h + 1
+            self._edge = edge
+        return self._edge
+
+    def root(self) -> bytes | None:
+        return self._right_edge()[-1] if len(self) else None
+
+    def proof(self, index: int) -> list[bytes]:
+        """Sibling digests from leaf `index` up to the root; O(log n)."""
+        n = len(self)
+        if not 0 <= index < n:
+            raise IndexError(f"leaf {index} not in a tree of {n}")
+        edge = self._right_edge()
+        path, count, h, k = [], n, 0, index
+        while count > 1:
+            sib = k ^ 1
+            if sib >= count:
+                sib = k  # odd one out: paired with itself
+            path.append(edge[h] if sib == count - 1 else self._bufs[h][sib].tobytes())
+            count, h, k = (count + 1) // 2, h + 1, k // 2
+        return path
+
+
+def verify_proof(leaf: bytes, index: int, path: list[bytes], root: bytes, tree_size: int) -> bool:
+    """
+    Recompute the root from a leaf, its index and a proof (MerkleAccumulator.proof / levels_proof)
+    for a tree of `tree_size` leaves. The index is bound to the tree's shape: it must exist, the
+    path must be exactly the tree's height, and a node may only be paired with itself where it is
+    the odd one out at the end of its level (so distinct positions never share a proof; a batch
+    whose adjacent leaves are identical can't be proven this way).
+    """
+    if not 0 <= index < tree_size:
+        return False
+    node, k, count = leaf, index, tree_size
+    for sib in path:
+        if count <= 1:
+            return False  # longer than the tree is tall
+        odd_one_out = k == count - 1 and count % 2 == 1
+        if (sib == node) != odd_one_out:
+            return False
+        node = hash_bytes(sib + node) if k % 2 else hash_bytes(node + sib)
+        k, count = k // 2, (count + 1) // 2
+    return count == 1 and node == root
@@ -6,7 +6,6 @@ import json
 import os
 import random
 import time
-from typing import List, Dict
 
 import numpy as np
 import faiss  # wheels installed; no extra deps
@@ -34,7 +33,7 @@ def load_vectors(path: str) -> np.ndarray:
     return vecs
 
 
-def coerce_ids(ids_obj, N: int) -> List[int]:
+def coerce_ids(ids_obj, N: int) -> list[int]:
     """
     Coerce various JSON id formats into a length-N python list[int] aligned to row order.
     If absent or malformed, fall back to identity mapping [0..N-1].
@@ -66,7 +65,7 @@ def coerce_ids(ids_obj, N: int) -> List[int]:
     return list(range(N))
 
 
-def audit_norms(V: np.ndarray) -> Dict[str, float]:
+def audit_norms(V: np.ndarray) -> dict[str, float]:
     norms = np.linalg.norm(V, axis=1)
     nan_inf = int(np.isnan(norms).any() or np.isinf(norms).any())
     max_dev = float(np.max(np.abs(norms - 1.0)))
@@ -89,7 +88,7 @@ def sample_indices(N: int, S: int, seed: int = 0) -> np.ndarray:
     return rng.choice(N, size=S, replace=False)
 
 
-def overlap_at_k(truth: List[List[int]], cand: List[List[int]], K: int) -> float:
+def overlap_at_k(truth: list[list[int]], cand: list[list[int]], K: int) -> float:
     acc = 0.0
     for t, c in zip(truth, cand):
         acc += len(set(t[:K]).intersection(c[:K])) / float(K)
@@ -103,9 +102,9 @@ def overlap_at_k(truth: List[List[int]], cand: List[List[int]], K: int) -> float
 
 def truth_faiss(
     index: faiss.IndexFlatIP, V: np.ndarray, K: int, pool: np.ndarray
-) -> List[List[int]]:
+) -> list[list[int]]:
     """Truth via FAISS Flat (exact). Exclude self by row-id."""
-    out: List[List[int]] = []
+    out: list[list[int]] = []
     for i in pool:
         i_py = int(i)
         q = V[i_py : i_py + 1]
@@ -117,7 +116,7 @@ def truth_faiss(
 
 def truth_numpy_stable(
     V: np.ndarray, K: int, pool: np.ndarray, eps: float = 1e-10
-) -> List[List[int]]:
+) -> list[list[int]]:
     """
     Stable NumPy truth with deterministic tie-break:
     - sim = V @ V[i]^T (float32)
@@ -126,7 +125,7 @@ def truth_numpy_stable(
     """
     N = V.shape[0]
     ids_arr = np.arange(N, dtype=np.int64)
-    out: List[List[int]] = []
+    out: list[list[int]] = []
     for i in pool:
         i_py = int(i)
         sim = (V @ V[i_py : i_py + 1].T).ravel()  # (N,)
@@ -143,7 +142,7 @@ def truth_numpy_stable(
 
 def cand_faiss_flat(
     index: faiss.IndexFlatIP, V: np.ndarray, K: int, pool: np.ndarray
-) -> List[List[int]]:
+) -> list[list[int]]:
     """Candidate from FAISS Flat (exact)."""
     return truth_faiss(index, V, K, pool)  # same logic (self-exclusion by id)
 
@@ -154,12 +153,12 @@ def cand_rerank64_from_faiss(
     K: int,
     pool: np.ndarray,
     eps: float = 1e-12,
-) -> List[List[int]]:
+) -> list[list[int]]:
     """
     Take FAISS top-K, then re-rank those K in float64 with deterministic tie-break (by id).
     """
     V64 = V.astype(np.float64, copy=False)
-    out: List[List[int]] = []
+    out: list[list[int]] = []
     for i in pool:
         i_py = int(i)
         q = V[i_py : i_py + 1]
@@ -181,12 +180,56 @@ def cand_rerank64_from_faiss(
     return out
 
 
+def cand_quant_rerank(
+    V: np.ndarray, K: int, pool: np.ndarray, fmt: str, rerank: int = 64
+) -> tuple:
+    """
+    Product /ask path with index.quantized=fmt: compact (int8/float16) scan, then
+    float32 re-score of the top `rerank` rows. Returns (cands, receipt) where the
+    receipt has bytes_ratio_vs_f32 and per-query p50/p95 ms against the exact
+    NumPy scan (index.quantized unset) over the same pool.
+    """
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from api.services.retrieval_numpy import NumpySearch, QuantizedSearch, quantize_rows
+
+    Xq, scales = quantize_rows(V, fmt)
+    search = QuantizedSearch(V, Xq, scales, rerank=max(rerank, K + 1))
+    exact = NumpySearch(V)
+    search.search(V[int(pool[0])], K + 1)  # warm
+    exact.search(V[int(pool[0])], K + 1)
+    out: list[list[int]] = []
+    t_quant: list[float] = []
+    t_exact: list[float] = []
+    for i in pool:
+        i_py = int(i)
+        t0 = time.perf_counter()
+        idxs, _ = search.search(V[i_py], K + 1)
+        t_quant.append((time.perf_counter() - t0) * 1000.0)
+        t0 = time.perf_counter()
+        exact.search(V[i_py], K + 1)
+        t_exact.append((time.perf_counter() - t0) * 1000.0)
+        out.append([int(j) for j in idxs.tolist() if int(j) != i_py][:K])
+    compact = Xq.nbytes + (scales.nbytes if scales is not None else 0)
+    receipt = {
+        "bytes_ratio_vs_f32": float(V.nbytes) / float(compact),
+        "rerank": rerank,
+        "p50_ms": float(np.percentile(t_quant, 50)),
+        "p95_ms": p95_ms(t_quant),
+        "exact_numpy_p50_ms": float(np.percentile(t_exact, 50)),
+        "exact_numpy_p95_ms": p95_ms(t_exact),
+    }
+    receipt["speedup_p50"] = receipt["exact_numpy_p50_ms"] / receipt["p50_ms"]
+    return out, receipt
+
+
 # ---------------------------
 # Latency bench (FAISS Flat)
 # ---------------------------
 
 
-def p95_ms(values_ms: List[float]) -> float:
+def p95_ms(values_ms: list[float]) -> float:
     return float(np.percentile(np.asarray(values_ms, dtype=np.float64), 95))
 
 
@@ -202,7 +245,7 @@ def bench_faiss_p95(
         return 0.0
     # warm-up
     _ = index.search(V[pool[0] : pool[0] + 1], K)
-    times: List[float] = []
+    times: list[float] = []
     rng = np.random.default_rng(1)
     S = len(pool)
     for _ in range(total_searches):
@@ -239,7 +282,8 @@ def main():
     ap.add_argument(
         "--modes",
         default="faiss_truth,numpy_truth,faiss_flat,cand_rerank64",
-        help="Comma-separated among: faiss_truth,numpy_truth,faiss_flat,cand_rerank64",
+        help="Comma-separated among: faiss_truth,numpy_truth,faiss_flat,cand_rerank64,"
+        "cand_int8,cand_float16",
     )
     ap.add_argument(
         "--receipt",
@@ -270,10 +314,10 @@ def main():
     modes = [m.strip() for m in args.modes.split(",") if m.strip()]
 
     # Truths/candidates storage
-    truth_f: List[List[int]] = []
-    truth_n: List[List[int]] = []
-    cand_f: List[List[int]] = []
-    cand_r: List[List[int]] = []
+    truth_f: list[list[int]] = []
+    truth_n: list[list[int]] = []
+    cand_f: list[list[int]] = []
+    cand_r: list[list[int]] = []
 
     # Compute as requested
     if "faiss_truth" in modes:
@@ -284,6 +328,13 @@ def main():
         cand_f = cand_faiss_flat(index, V, args.k, pool)
     if "cand_rerank64" in modes:
         cand_r = cand_rerank64_from_faiss(index, V, args.k, pool, eps=1e-12)
+    cand_q: dict[str, list[list[int]]] = {}
+    ablations: dict[str, dict] = {}
+    for fmt in ("int8", "float16"):
+        if f"cand_{fmt}" in modes:
+            cand_q[fmt], ablations[f"quantized_{fmt}"] = cand_quant_rerank(
+                V, args.k, pool, fmt, rerank=64
+            )
 
     # Overlap metrics (only if both sides present)
     overlaps = {}
@@ -304,6 +355,16 @@ def main():
             overlap_at_k(truth_n, cand_r, args.k)
         )
 
+    for fmt, cand in cand_q.items():
+        if truth_f:
+            overlaps[f"faiss_truth_vs_{fmt}_rerank"] = float(
+                overlap_at_k(truth_f, cand, args.k)
+            )
+        if truth_n:
+            overlaps[f"numpy_truth_vs_{fmt}_rerank"] = float(
+                overlap_at_k(truth_n, cand, args.k)
+            )
+
     # Latency bench (FAISS flat)
     p95 = bench_faiss_p95(index, V, args.k, pool, total_searches=1000)
 
@@ -329,7 +390,7 @@ def main():
         "gates": gates,
         "status": status,
         "notes": "Truth=FAISS Flat; NumPy truth uses stable (−score, id/N ε) tie-break; candidates: faiss_flat and rerank64@K.",
-        "ablations": {},  # optional future fills
+        "ablations": ablations,  # quantized first pass (cand_int8 / cand_float16)
     }
     with open(args.receipt, "w", encoding="utf-8") as f:
         json.dump(doc, f, indent=2)
@@ -166,6 +166,8 @@ def main() -> None:
         d = V.shape[1]
         idx = faiss.IndexFlatIP(d)
         idx.add(V)
+        # persisted for the /ask backend (index.backend: faiss)
+        faiss.write_index(idx, args.output)
     elif args.algo == "faiss_ivf":
         V = np.ascontiguousarray(np.load(args.input).astype(np.float32))
         faiss.normalize_L2(V)
@@ -177,9 +179,8 @@ def main() -> None:
         idx.add(V)
         idx.nprobe = 16
         params = {"nlist": nlist, "nprobe": 16}
-        # optional sidecar
+        # persisted for the /ask backend (index.backend: faiss_ivf)
         faiss.write_index(idx, args.output)
-        json.dump(params, open(args.output + ".meta.json", "w", encoding="utf-8"))
     else:  # hnsw
         if hnswlib is None:
             print("hnswlib not installed; skipping on Windows.", file=sys.stderr)
@@ -191,8 +192,12 @@ def main() -> None:
         idx.init_index(max_elements=V.shape[0], ef_construction=200, M=16)
         idx.add_items(V)
         idx.set_ef(200)
-        params = {"ef_construction": 200, "M": 16}
-        # no save to disk here
+        params = {"ef_construction": 200, "M": 16, "ef_search": 200}
+        # persisted for the /ask backend (index.backend: hnsw)
+        idx.save_index(args.output)
+    # sidecar params are read back by the /ask backend alongside the index
+    with open(args.output + ".meta.json", "w", encoding="utf-8") as f:
+        json.dump(params, f)
 
     # If not --verify, we’re done (build-only path).
     if not args.verify:
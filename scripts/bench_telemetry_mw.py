@@ -0,0 +1,96 @@
+# scripts/bench_telemetry_mw.py — Per-request cost of the ASGI telemetry middleware
+# Purpose: receipt for the <50µs enabled / ~0 disabled budget (api/middleware)
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.middleware import telemetry
+from api.services.telemetry import TelemetrySink
+
+
+async def inner_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    return None
+
+
+def scope() -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/ask",
+        "query_string": b"q=safety+signals&k=5",
+        "headers": [],
+    }
+
+
+async def per_request_us(app, n: int) -> float:
+    for _ in range(200):  # warm
+        await app(scope(), receive, send)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await app(scope(), receive, send)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def settings(log: bool, metrics: bool) -> telemetry.TelemetrySettings:
+    s = telemetry.TelemetrySettings()
+    s.log, s.metrics, s.sample_rate = log, metrics, 1.0
+    return s
+
+
+async def run(n: int, reps: int) -> dict:
+    # flusher never fires during the run: the request path cost is the append only
+    telemetry.SINK = TelemetrySink(path=os.devnull, capacity=n + 1000, flush_ms=3_600_000)
+    telemetry.TELEM["hydrated"] = True
+    variants = {
+        "bare": inner_app,
+        "disabled": telemetry.TelemetryMiddleware(inner_app, settings(False, False)),
+        "metrics_only": telemetry.TelemetryMiddleware(inner_app, settings(False, True)),
+        "metrics_and_log": telemetry.TelemetryMiddleware(inner_app, settings(True, True)),
+    }
+    out = {}
+    for name, app in variants.items():
+        out[name] = float(np.median([await per_request_us(app, n) for _ in range(reps)]))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Telemetry middleware overhead benchmark")
+    ap.add_argument("--requests", type=int, default=20000)
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--receipt", default="binder_receipts/telemetry_mw_bench.json")
+    args = ap.parse_args()
+
+    us = asyncio.run(run(args.requests, args.reps))
+    overhead = {k: us[k] - us["bare"] for k in us if k != "bare"}
+    gates = {"enabled_overhead_us": 50.0}
+    doc = {
+        "per_request_us": us,
+        "overhead_us": overhead,
+        "gates": gates,
+        "status": "PASS" if overhead["metrics_and_log"] <= gates["enabled_overhead_us"] else "FAIL",
+    }
+    os.makedirs(os.path.dirname(args.receipt), exist_ok=True)
+    with open(args.receipt, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(json.dumps({"status": doc["status"], "overhead_us": overhead}))
+
+
+if __name__ == "__main__":
+    main()
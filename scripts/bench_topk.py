@@ -0,0 +1,67 @@
+# scripts/bench_topk.py — Top-k micro-benchmark: argsort vs argpartition (stable)
+# Purpose: receipt for per-query selection cost in retrieval_numpy.NumpySearch
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.retrieval_numpy import topk_stable
+
+
+def bench_ms(fn, sims: np.ndarray, k: int, reps: int) -> dict:
+    fn(sims, k)  # warm
+    times = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn(sims, k)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    arr = np.asarray(times, dtype=np.float64)
+    return {
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+    }
+
+
+def full_sort(sims: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-sims)[:k]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Top-k selection micro-benchmark")
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--k", type=int, default=20)
+    ap.add_argument("--reps", type=int, default=50)
+    ap.add_argument("--receipt", default="binder_receipts/topk_bench.json")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = {}
+    for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        # cosine-like float32 scores, as produced by X @ q
+        sims = rng.uniform(-1.0, 1.0, size=n).astype(np.float32)
+        full = bench_ms(full_sort, sims, args.k, args.reps)
+        part = bench_ms(topk_stable, sims, args.k, args.reps)
+        truth = np.lexsort((np.arange(n), -sims))[: args.k]
+        same = topk_stable(sims, args.k).tolist() == truth.tolist()
+        rows[str(n)] = {
+            "argsort": full,
+            "argpartition_stable": part,
+            "speedup_p50": full["p50_ms"] / max(part["p50_ms"], 1e-9),
+            "parity": same,
+        }
+
+    doc = {"k": args.k, "reps": args.reps, "sizes": rows}
+    os.makedirs(os.path.dirname(args.receipt), exist_ok=True)
+    with open(args.receipt, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(json.dumps({n: round(r["speedup_p50"], 1) for n, r in rows.items()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# scripts/partition_maintenance.py — Pre-create / expire interaction_log partitions
+# Purpose: cron-able counterpart of the INTERACTION_PARTITIONS_ON_STARTUP hook
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.partitions import PartitionPolicy, maintain
+
+
+def main():
+    env = PartitionPolicy.from_env()
+    ap = argparse.ArgumentParser(description="Maintain interaction_log range partitions")
+    ap.add_argument("--granularity", choices=("day", "month"), default=env.granularity)
+    ap.add_argument("--premake", type=int, default=env.premake)
+    ap.add_argument("--lookback", type=int, default=env.lookback)
+    ap.add_argument("--retention", type=int, default=env.retention, help="periods to keep")
+    ap.add_argument("--expire", choices=("detach", "drop"), default=env.expire)
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--receipt", default=None, help="optional JSON report path")
+    args = ap.parse_args()
+
+    from api.database import engine  # needs DATABASE_URL
+
+    policy = PartitionPolicy(
+        granularity=args.granularity,
+        premake=args.premake,
+        lookback=args.lookback,
+        retention=args.retention,
+        expire=args.expire,
+    )
+    report = maintain(engine, policy, dry_run=args.dry_run)
+    if args.receipt:
+        os.makedirs(os.path.dirname(args.receipt) or ".", exist_ok=True)
+        with open(args.receipt, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
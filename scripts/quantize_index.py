@@ -0,0 +1,64 @@
+# scripts/quantize_index.py — Write int8 / float16 sidecars next to index.npy
+# Purpose: compact first-pass matrix for /ask (index.quantized: int8 | float16)
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.retrieval_numpy import (
+    index_signature,
+    quant_meta_path,
+    quant_paths,
+    quantize_rows,
+)
+
+
+def save_replace(path, arr: np.ndarray) -> None:
+    """Write-then-rename so a live API never mmaps a half-written file."""
+    tmp = str(path) + ".tmp.npy"
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Quantize index.npy for the /ask first pass")
+    ap.add_argument("--input", required=True, help="clarity_clean_analysis/02_output/index.npy")
+    ap.add_argument("--formats", default="int8,float16")
+    args = ap.parse_args()
+
+    source = index_signature(args.input)
+    X = np.load(args.input, mmap_mode="r")
+    out = {}
+    for fmt in [f.strip() for f in args.formats.split(",") if f.strip()]:
+        Xq, scales = quantize_rows(np.asarray(X, dtype=np.float32), fmt)
+        p_data, p_scales = quant_paths(args.input, fmt)
+        save_replace(p_data, Xq)
+        nbytes = Xq.nbytes
+        if p_scales is not None:
+            save_replace(p_scales, scales)
+            nbytes += scales.nbytes
+        # last: the API only trusts sidecars whose meta names the current index.npy
+        meta = quant_meta_path(args.input, fmt)
+        with open(str(meta) + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"format": fmt, "source": source}, f)
+        os.replace(str(meta) + ".tmp", meta)
+        out[fmt] = {"path": str(p_data), "bytes_ratio_vs_f32": X.nbytes / nbytes}
+    print(
+        json.dumps(
+            {
+                "status": "DONE",
+                "N": int(X.shape[0]),
+                "D": int(X.shape[1]),
+                "formats": out,
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()